@@ -1,77 +1,265 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 '''
+Bit and byte conversions. Bits are lists of ints, most significant bit first. bit_bytes,
+bits_from_bytes, bytes_from_bits and hex_escape work on bytes, bytearray or memoryview
+through 256-entry translate tables and int.from_bytes / int.to_bytes, the older functions
+are wrappers accepting str as well. BitArray packs bits into a bytearray, one bit per bit
+instead of one list item; bytes2bin and dec2bin return it with as_bitarray=True, bin2dec and
+bin2bytes accept it.
+
 Created on 23.2.2012
 
 @author: David
 '''
 
+import os
 
-def bytes2bin(raw_bytes, sz=8):
-    """Accepts a string of bytes (chars) and returns an array of bits representing
-    the bytes in big endian byte (Most significant byte/bit first) order.  Each byte
-    can have it's higher bits ignored by passing a sz."""
+
+__TO_ASCII__ = bytes.maketrans(b'\x00\x01', b'01')
+__FROM_ASCII__ = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def _as_bytes(raw_bytes):
+    """str of chars (old API) to bytes, keeping the low 8 bits of every char; buffers as they are."""
+    if not isinstance(raw_bytes, str):
+        return raw_bytes
+    try:
+        return raw_bytes.encode('latin-1')
+    except UnicodeEncodeError:
+        return bytes(ord(c) & 0xff for c in raw_bytes)
+
+
+def bit_bytes(data, sz=8):
+    """Returns bytes with one 0/1 value per bit (MSB first) of bytes, bytearray or memoryview,
+    keeping the low sz bits of every byte. The whole buffer goes through int.from_bytes and
+    one binary format, so the work stays in C."""
     if sz < 1 or sz > 8:
         raise ValueError("Invalid sz value: " + str(sz))
-    ret_val = []
-    for b in raw_bytes:
-        bits = []
-        b = ord(b)
-        while b > 0:
-            bits.append(b & 1)
-            b >>= 1
-
-        if len(bits) < sz:
-            bits.extend([0] * (sz - len(bits)))
-        elif len(bits) > sz:
-            bits = bits[:sz]
-
-        bits.reverse()  # Big endian byte order.
-        ret_val.extend(bits)
+    data = memoryview(data).cast('B')
+    if not len(data):
+        return b''
+    bits = format(int.from_bytes(data, 'big'), '0{}b'.format(8 * len(data))).encode('ascii').translate(
+        __FROM_ASCII__)
+    if sz == 8:
+        return bits
+    out = bytearray(sz * len(data))
+    for i in range(sz):                     # sz strided copies drop the high bits of every byte
+        out[i::sz] = bits[8 - sz + i::8]
+    return bytes(out)
+
+
+def bits_from_bytes(data, sz=8):
+    """Returns list of bits (MSB first) of bytes, bytearray or memoryview, see bit_bytes."""
+    return list(bit_bytes(data, sz))
+
+
+def bytes_from_bits(bits):
+    """Returns bytes from bits (MSB first), a list of ints, bytes from bit_bytes or BitArray. If
+    the count is not a multiple of 8, the first byte gets the leading bits."""
+    if not len(bits):
+        return b''
+    if isinstance(bits, BitArray):
+        return int(bits).to_bytes((len(bits) + 7) // 8, 'big')
+    return int(bytes(bits).translate(__TO_ASCII__), 2).to_bytes((len(bits) + 7) // 8, 'big')
+
+
+def hex_escape(data):
+    """Returns bytes as '\\x01\\x02...' string."""
+    if not len(data):
+        return ''
+    return '\\x' + memoryview(data).cast('B').hex(' ').replace(' ', '\\x')
+
+
+def _popcount(n):
+    return n.bit_count() if hasattr(n, 'bit_count') else bin(n).count('1')
+
+
+class BitArray:
+    """Packed bits, MSB first: bit 0 is the highest bit of the first byte of a bytearray, so
+    one bit costs one bit of memory. Unused bits of the last byte are always zero. Slices
+    with step 1, bitwise operations, shifts and popcount run on the whole buffer converted
+    to int, i.e. in C. Shifts keep the length (bits shifted out are lost, zeros come in).
+    Bitwise operations need arrays of the same length."""
+
+    __slots__ = ('_data', '_len')
+
+    def __init__(self, bits=()):
+        """:param bits iterable of 0/1 (list, bytes from bit_bytes, another BitArray, ...)"""
+        if isinstance(bits, BitArray):
+            self._data, self._len = bytearray(bits._data), bits._len
+            return
+        bits = bytes(bits)
+        self._len = len(bits)
+        pad = -self._len % 8
+        self._data = bytearray(int(bits.translate(__TO_ASCII__) + b'0' * pad, 2).to_bytes(
+            (self._len + pad) // 8, 'big') if bits else b'')
+
+    @classmethod
+    def _wrap(cls, data, length):
+        result = cls.__new__(cls)
+        result._data, result._len = data, length
+        return result
+
+    @classmethod
+    def zeros(cls, length):
+        return cls._wrap(bytearray((length + 7) // 8), length)
+
+    @classmethod
+    def from_bytes(cls, data, sz=8):
+        """BitArray of bytes, bytearray or memoryview, keeping the low sz bits of every byte."""
+        if sz == 8:
+            data = bytearray(memoryview(data).cast('B'))
+            return cls._wrap(data, 8 * len(data))
+        return cls(bit_bytes(data, sz))
+
+    @classmethod
+    def from_int(cls, n, length=None):
+        """BitArray of non-negative n, length = its bit length (at least 1) or the given
+        length; higher bits of n that do not fit are dropped."""
+        if n < 0:
+            raise ValueError('negative value: {}'.format(n))
+        if length is None:
+            length = max(1, n.bit_length())
+        pad = -length % 8
+        n &= (1 << length) - 1
+        return cls._wrap(bytearray((n << pad).to_bytes((length + pad) // 8, 'big')), length)
+
+    def __int__(self):
+        return int.from_bytes(self._data, 'big') >> (-self._len % 8)
+
+    def to_bytes(self):
+        """Bytes of the storage, i.e. bits left aligned, the last byte padded with zeros."""
+        return bytes(self._data)
+
+    def to01(self):
+        return bit_bytes(self._data)[:self._len].translate(__TO_ASCII__).decode('ascii')
+
+    def tolist(self):
+        return list(bit_bytes(self._data)[:self._len])
 
+    def popcount(self):
+        return _popcount(int.from_bytes(self._data, 'big'))
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return iter(bit_bytes(self._data)[:self._len])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return BitArray(bit_bytes(self._data)[:self._len][index])
+            length = max(0, stop - start)
+            return BitArray.from_int((int(self) >> (self._len - start - length)), length)
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError('BitArray index out of range')
+        return (self._data[index >> 3] >> (7 - (index & 7))) & 1
+
+    def __setitem__(self, index, value):
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError('BitArray index out of range')
+        if value:
+            self._data[index >> 3] |= 0x80 >> (index & 7)
+        else:
+            self._data[index >> 3] &= ~(0x80 >> (index & 7)) & 0xff
+
+    def append(self, bit):
+        if not self._len % 8:
+            self._data.append(0)
+        self._len += 1
+        self[self._len - 1] = bit
+
+    def __add__(self, other):
+        if not isinstance(other, BitArray):
+            other = BitArray(other)
+        return BitArray.from_int((int(self) << other._len) | int(other), self._len + other._len)
+
+    def __eq__(self, other):
+        if not isinstance(other, BitArray):
+            return NotImplemented
+        return self._len == other._len and self._data == other._data
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "BitArray('{}')".format(self.to01())
+
+    def _same(self, other):
+        if not isinstance(other, BitArray) or other._len != self._len:
+            raise ValueError('bitwise operation needs BitArray of the same length')
+        return int.from_bytes(other._data, 'big')
+
+    def _result(self, n):
+        return BitArray._wrap(bytearray(n.to_bytes(len(self._data), 'big')), self._len)
+
+    def __and__(self, other):
+        return self._result(int.from_bytes(self._data, 'big') & self._same(other))
+
+    def __or__(self, other):
+        return self._result(int.from_bytes(self._data, 'big') | self._same(other))
+
+    def __xor__(self, other):
+        return self._result(int.from_bytes(self._data, 'big') ^ self._same(other))
+
+    def __invert__(self):
+        return BitArray.from_int(int(self) ^ ((1 << self._len) - 1), self._len)
+
+    def __lshift__(self, n):
+        return BitArray.from_int(int(self) << n, self._len)
+
+    def __rshift__(self, n):
+        return BitArray.from_int(int(self) >> n, self._len)
+
+
+def bytes2bin(raw_bytes, sz=8, as_bitarray=False):
+    """Accepts a string of bytes (chars) and returns an array of bits representing
+    the bytes in big endian byte (Most significant byte/bit first) order.  Each byte
+    can have it's higher bits ignored by passing a sz. bytes, bytearray and memoryview
+    are accepted too, see bits_from_bytes. as_bitarray returns BitArray instead of list."""
+    if as_bitarray:
+        return BitArray.from_bytes(_as_bytes(raw_bytes), sz) if len(raw_bytes) else BitArray([0])
+    ret_val = bits_from_bytes(_as_bytes(raw_bytes), sz)
     if len(ret_val) == 0:
         ret_val = [0]
     return ret_val
 
 
 def bin2bytes(x):
-    """Convert an array of bits (MSB first) into a string of characters."""
-    bits = list(reversed(x))
-    out = []
-    
-    for i in range(0, len(bits), 8):
-        byte_bits = bits[i:i+8]
-        ttl = sum(b * (2 ** j) for j, b in enumerate(byte_bits))
-        out.append(chr(ttl))
-    
-    return ''.join(reversed(out))
+    """Convert an array of bits (MSB first) into a string of characters. For bytes use
+    bytes_from_bits."""
+    return bytes_from_bits(x).decode('latin-1')
 
 
 def bin2dec(x):
-    """Convert an array of "bits" (MSB first) to it's decimal value."""
-    return sum(b * (2 ** i) for i, b in enumerate(reversed(x)))
+    """Convert an array of "bits" (MSB first) or BitArray to it's decimal value."""
+    if isinstance(x, BitArray):
+        return int(x)
+    try:
+        return int(bytes(x).translate(__TO_ASCII__), 2) if len(x) else 0
+    except ValueError:                      # "bits" other than 0/1
+        return sum(b * (2 ** i) for i, b in enumerate(reversed(x)))
 
 
 def bytes2dec(raw_bytes, sz=8):
+    if sz == 8:
+        return int.from_bytes(_as_bytes(raw_bytes), 'big')
     return bin2dec(bytes2bin(raw_bytes, sz))
 
 
-def dec2bin(n, p=0):
+def dec2bin(n, p=0, as_bitarray=False):
     """Convert a decimal value to an array of bits (MSB first), optionally padding
-    the overall size to p bits. """
+    the overall size to p bits. as_bitarray returns BitArray instead of list."""
     assert n >= 0
-    if n == 0:
-        return [0] * max(1, p)
-    
-    ret_val = []
-    while n > 0:
-        ret_val.append(n & 1)
-        n >>= 1
-    
-    if p > 0 and len(ret_val) < p:
-        ret_val.extend([0] * (p - len(ret_val)))
-    
-    return list(reversed(ret_val))
+    if as_bitarray:
+        return BitArray.from_int(n, max(p, n.bit_length(), 1))
+    return list(format(n, '0{}b'.format(max(p, 1))).encode('ascii').translate(__FROM_ASCII__))
 
 
 def dec2bytes(n, p=0):
@@ -100,7 +288,41 @@ def bin2synchsafe(x):
 
 
 def bytes2str(raw_bytes):
-    s = ""
-    for b in raw_bytes:
-        s += ("\\x%02x" % ord(b))
-    return s
+    return hex_escape(_as_bytes(raw_bytes))
+
+
+def benchmark(size=1024 * 1024, rounds=3):
+    """Measures throughput of the bytes native conversions on size random bytes. Returns
+    dictionary function name -> MB/s (best of rounds)."""
+    import time
+    data = os.urandom(size)
+    bits = bits_from_bytes(data)
+    packed = BitArray.from_bytes(data)
+    cases = (('bit_bytes', bit_bytes, data), ('bits_from_bytes', bits_from_bytes, data),
+             ('bytes_from_bits', bytes_from_bits, bits), ('hex_escape', hex_escape, data),
+             ('bytes2bin(str)', bytes2bin, data.decode('latin-1')), ('bytes2dec', bytes2dec, data),
+             ('BitArray ^ <<', lambda b: (b ^ (b << 1)).popcount(), packed))
+    result = {}
+    for name, func, arg in cases:
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func(arg)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        result[name] = size / 1e6 / best if best else float('inf')
+    return result
+
+
+def prepare_arguments(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark of binUtils conversions.')
+    parser.add_argument('--size', type=int, default=1024 * 1024, help='buffer size in bytes')
+    parser.add_argument('--rounds', type=int, default=3)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    argumenty = prepare_arguments()
+    for jmeno, rychlost in benchmark(argumenty.size, argumenty.rounds).items():
+        print('{:16s} {:10.1f} MB/s'.format(jmeno, rychlost))
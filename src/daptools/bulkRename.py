@@ -0,0 +1,205 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+bulkRename - hromadne prejmenovani files podle slovniku stary -> novy (myTools.rename_files,
+fileHasher). Planovac seradi prejmenovani tak, aby zadny cil nebyl obsazen filem, ktery se
+teprve ma prejmenovat: retezy (a->b, b->c) jdou od konce, cykly (a->b, b->a) se rozpoji jednim
+docasnym jmenem na cyklus. Prejmenovava se pres os.rename s file deskriptory adresaru (renameat),
+jen pri presunu na jiny filesystem se pouzije shutil.move. Volitelny zurnal umozni po padu
+pokracovat (resume) nebo vse vratit (rollback).
+Created on 18/10/2026, 16:05
+
+@author: David Potucek
+"""
+
+import os, json, errno
+
+__MAGIC__ = 'daptools-rename-1'
+__MAX_DIR_FDS__ = 256           # kolik adresaru drzet otevrenych
+
+
+def plan_renames(mapping, overwrite=False):
+    """Vyrobi poradi prejmenovani pro slovnik stary -> novy. Prejmenovani na sebe sama vypadnou.
+    :param overwrite povolit cil, ktery existuje a sam se neprejmenovava (prepise se)
+    :return seznam dvojic (zdroj, cil) s absolutnimi cestami
+    :raise ValueError pro dva zdroje se stejnym cilem, chybejici zdroj nebo obsazeny cil"""
+    renames = {}
+    for old, new in mapping.items():
+        old, new = os.path.abspath(old), os.path.abspath(new)
+        if old != new:
+            renames[old] = new
+    sources = {}                            # cil -> zdroj
+    for old, new in renames.items():
+        if new in sources:
+            raise ValueError('{} a {} maji stejny cil {}'.format(sources[new], old, new))
+        sources[new] = old
+    missing = [old for old in renames if not os.path.lexists(old)]
+    if missing:
+        raise ValueError('{} zdroju neexistuje, napr. {}'.format(len(missing), missing[0]))
+    if not overwrite:
+        taken = [new for new in sources if new not in renames and os.path.lexists(new)]
+        if taken:
+            raise ValueError('{} cilu uz existuje, napr. {}'.format(len(taken), taken[0]))
+    steps, done = [], set()
+    for start in renames:
+        if start in sources:                # neni zacatek retezu
+            continue
+        chain = [start]
+        while chain[-1] in renames:
+            chain.append(renames[chain[-1]])
+        for i in range(len(chain) - 2, -1, -1):       # od konce, cil je vzdy volny
+            steps.append((chain[i], chain[i + 1]))
+        done.update(chain)
+    planned = set(renames) | set(sources)
+    for start in renames:
+        if start in done:
+            continue
+        cycle = [start]                     # zbyle zdroje lezi na cyklech
+        while renames[cycle[-1]] != start:
+            cycle.append(renames[cycle[-1]])
+        done.update(cycle)
+        tmp = _temp_name(start, planned)
+        planned.add(tmp)
+        steps.append((cycle[0], tmp))
+        for i in range(len(cycle) - 1, 0, -1):
+            steps.append((cycle[i], renames[cycle[i]]))
+        steps.append((tmp, cycle[1]))
+    return steps
+
+
+def _temp_name(path, planned):
+    """Volne docasne jmeno ve stejnem adresari (tedy na stejnem filesystemu)."""
+    directory, name = os.path.split(path)
+    n = 0
+    while True:
+        tmp = os.path.join(directory, '.{}.{}.rename{}'.format(name, os.getpid(), n))
+        if tmp not in planned and not os.path.lexists(tmp):
+            return tmp
+        n += 1
+
+
+class _DirFds:
+    """Cache otevrenych adresaru pro renameat."""
+
+    def __init__(self):
+        self.fds = {}
+
+    def get(self, directory):
+        fd = self.fds.get(directory)
+        if fd is None:
+            if len(self.fds) >= __MAX_DIR_FDS__:
+                self.close()
+            fd = self.fds[directory] = os.open(directory, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+        return fd
+
+    def close(self):
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds.clear()
+
+
+def _rename(src, dst, fds):
+    """Jedno prejmenovani; na jiny filesystem presune pres shutil.move."""
+    try:
+        if fds is None:
+            os.rename(src, dst)
+        else:
+            (src_dir, src_name), (dst_dir, dst_name) = os.path.split(src), os.path.split(dst)
+            os.rename(src_name, dst_name, src_dir_fd=fds.get(src_dir), dst_dir_fd=fds.get(dst_dir))
+    except OSError as error:
+        if error.errno != errno.EXDEV:
+            raise
+        import shutil
+        shutil.move(src, dst)
+
+
+def _was_done(src, dst):
+    """Prejmenovani, ktere probehlo, ale nestihlo se zapsat do zurnalu."""
+    return not os.path.lexists(src) and os.path.lexists(dst)
+
+
+def execute_plan(steps, journal=None, start=0):
+    """Provede prejmenovani z plan_renames. Se zurnalem nejdriv zapise cely plan a po kazdem
+    kroku jeho cislo; po uspesnem konci zurnal smaze.
+    :param start od ktereho kroku zacit (pouziva resume)
+    :return pocet provedenych kroku"""
+    fds = _DirFds() if os.rename in os.supports_dir_fd else None
+    log = None
+    try:
+        if journal is not None:
+            log = open(journal, 'a' if start else 'w')
+            if not start:
+                log.write(json.dumps({'format': __MAGIC__, 'steps': steps}) + '\n')
+                log.flush()
+                os.fsync(log.fileno())          # plan musi byt na disku driv nez prvni zmena
+        for i in range(start, len(steps)):
+            _rename(steps[i][0], steps[i][1], fds)
+            if log is not None:
+                log.write('done {}\n'.format(i))
+                log.flush()
+    finally:
+        if fds is not None:
+            fds.close()
+        if log is not None:
+            log.close()
+    if journal is not None:
+        os.remove(journal)
+    return len(steps) - start
+
+
+def _load_journal(journal):
+    """Vrati plan ze zurnalu a pocet kroku, ktere urcite probehly."""
+    with open(journal) as fh:
+        header = json.loads(fh.readline())
+        if header.get('format') != __MAGIC__:
+            raise ValueError('{} neni zurnal prejmenovani'.format(journal))
+        steps = [tuple(step) for step in header['steps']]
+        done = 0
+        for line in fh:
+            if line.startswith('done ') and line.endswith('\n'):     # posledni radek mohl byt useknuty
+                done = max(done, int(line[5:]) + 1)
+    while done < len(steps) and _was_done(*steps[done]):
+        done += 1                           # zapis do zurnalu se nestihl
+    return steps, done
+
+
+def resume(journal):
+    """Dokonci prejmenovani prerusene padem podle zurnalu. Vrati pocet dodelanych kroku."""
+    steps, done = _load_journal(journal)
+    return execute_plan(steps, journal, done)
+
+
+def rollback(journal):
+    """Vrati provedene kroky ze zurnalu v opacnem poradi a zurnal smaze. Kroky, ktere uz
+    vracene jsou (predchozi prerusany rollback), preskoci. File prepsany s overwrite uz vratit
+    nejde. Vrati pocet vracenych kroku."""
+    steps, done = _load_journal(journal)
+    undone = 0
+    for src, dst in reversed(steps[:done]):
+        if _was_done(src, dst):
+            _rename(dst, src, None)
+            undone += 1
+    os.remove(journal)
+    return undone
+
+
+def bulk_rename(mapping, journal=None, overwrite=False):
+    """Naplanuje a provede prejmenovani slovniku stary -> novy. Viz plan_renames a execute_plan.
+    :return pocet provedenych os.rename (vcetne docasnych u cyklu)"""
+    return execute_plan(plan_renames(mapping, overwrite), journal)
+
+
+def prepare_arguments(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Dokonci nebo vrati hromadne prejmenovani podle zurnalu.')
+    parser.add_argument('akce', choices=('resume', 'rollback'))
+    parser.add_argument('zurnal')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    argumenty = prepare_arguments()
+    if argumenty.akce == 'resume':
+        print('{} kroku dokonceno'.format(resume(argumenty.zurnal)))
+    else:
+        print('{} kroku vraceno'.format(rollback(argumenty.zurnal)))
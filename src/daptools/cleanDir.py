@@ -3,7 +3,9 @@
 '''
 cleanDir
 Clears files of following types: *.aux, *.log, *.gz produced by LaTeX.
-Dir location is specified in __path__ 
+Dir location is specified in __path__ or on the command line, clean_tree
+walks whole workspaces with configurable patterns, apply_policy keeps scratch
+trees under a size quota and age limit.
 
 Created on 18/05/2017, 13:14
 
@@ -12,9 +14,10 @@ Created on 18/05/2017, 13:14
 
 import os
 
-from .myTools import tree_walker, get_file_extension
+from .myTools import get_file_extension
 
 __koncovky__ = ('aux', 'log', 'gz')
+DEFAULT_PATTERNS = tuple('*.' + koncovka for koncovka in __koncovky__)
 
 __path__ = '/Users/david/Documents/work/O2/administrativa/TimeSheets/2018/'   #akceptaky
 
@@ -28,16 +31,438 @@ def filter_files(soubory):
     return output
 
 
-if __name__ == "__main__":
-    cesta = __path__
-    print(cesta)
-    files = tree_walker(cesta, False)
-    keSmazani = filter_files(files)
-    print(keSmazani)
-    for soubor in keSmazani:
+def _matcher(patterns):
+    """Compiles shell patterns (fnmatch) into one regular expression, returns its match method."""
+    import re
+    from fnmatch import translate
+    return re.compile('|'.join(translate(pattern) for pattern in patterns)).match
+
+
+def _clean_dir(path, match, dry_run):
+    """Worker: lists one directory through its file descriptor and unlinks matching files
+    relative to it. Returns list of subdirectories, list of (file, size) removed and list
+    of (path, error) failures."""
+    subdirs, removed, errors = [], [], []
+    use_fd = os.unlink in os.supports_dir_fd and os.scandir in os.supports_fd
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0)) if use_fd else None
+    except OSError as error:
+        return subdirs, removed, [(path, error.strerror)]
+    try:
+        with os.scandir(path if fd is None else fd) as it:
+            entries = list(it)          # list first, do not unlink while readdir is running
+        for entry in entries:
+            full = os.path.join(path, entry.name)
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(full)
+                    continue
+                if not match(entry.name):
+                    continue
+                size = entry.stat(follow_symlinks=False).st_size
+                if not dry_run:
+                    if fd is None:
+                        os.unlink(full)
+                    else:
+                        os.unlink(entry.name, dir_fd=fd)
+            except OSError as error:
+                errors.append((full, error.strerror))
+                continue
+            removed.append((full, size))
+    except OSError as error:
+        errors.append((path, error.strerror))
+    finally:
+        if fd is not None:
+            os.close(fd)
+    return subdirs, removed, errors
+
+
+def clean_tree(root, patterns=DEFAULT_PATTERNS, dry_run=False, workers=8, recursive=True):
+    """Removes files matching any of patterns under root. Directories are processed in a thread
+    pool, at most 2 * workers at once; each one is listed once with scandir and matching files
+    are unlinked relative to the directory descriptor (no path lookups). Symlinked directories
+    are not followed.
+    :param patterns shell patterns matched against file names, default *.aux, *.log, *.gz
+    :param dry_run only report what would be removed
+    :param recursive False = root directory only
+    :return dictionary with 'files' and 'bytes' removed (or to remove), 'dirs' visited,
+    'removed' list of (file, size) and 'errors' list of (path, message)"""
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    match = _matcher(patterns)
+    report = {'files': 0, 'bytes': 0, 'dirs': 0, 'removed': [], 'errors': []}
+    todo = deque([root])
+    pending = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while todo or pending:
+            while todo and len(pending) < 2 * workers:
+                pending.add(pool.submit(_clean_dir, todo.popleft(), match, dry_run))
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                subdirs, removed, errors = future.result()
+                report['dirs'] += 1
+                if recursive:
+                    todo.extend(subdirs)
+                report['files'] += len(removed)
+                report['bytes'] += sum(size for _, size in removed)
+                report['removed'].extend(removed)
+                report['errors'].extend(errors)
+    return report
+
+
+POLICY_ORDERS = ('oldest', 'largest')
+__UNITS__ = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_size(text):
+    """Converts size like 500M, 10G or 4096 (bytes) to bytes, binary units."""
+    text = text.strip().upper().rstrip('B')
+    unit = text[-1:] if text[-1:] in __UNITS__ else ''
+    return int(float(text[:len(text) - len(unit)]) * __UNITS__[unit])
+
+
+def apply_policy(root, max_bytes=None, older_than_days=None, order='oldest', dry_run=False, recursive=True,
+                 now=None):
+    """Enforces cleanup policy on a scratch tree: files older than older_than_days are removed and
+    of the rest the oldest (or largest) ones are removed until the tree fits into max_bytes.
+    The tree is read in a single scandir pass. The excess is known only at the end of the scan,
+    so the pass keeps a heap of the files to keep, bounded by max_bytes: a file that does not
+    fit pushes out the most removable ones, and a later file more removable than anything
+    already pushed out goes straight to the removal set. The result is the same as removing
+    files in order until the quota is met, but the whole tree is never sorted and the heap
+    holds only files that fit into the quota.
+    :param max_bytes quota in bytes, None = no quota
+    :param older_than_days age limit (mtime) in days, None = no age limit
+    :param order 'oldest' = remove the oldest files first, 'largest' = the largest first
+    :param dry_run only report what would be removed
+    :param now reference time for the age limit, default time.time()
+    :return dictionary with 'scanned' files and 'scanned_bytes', 'files' and 'bytes' removed
+    (or to remove), 'aged' and 'quota' counts per rule, 'remaining_bytes', 'removed' list of
+    (file, size), 'errors' list of (path, message) and 'times' in seconds per phase
+    (scan, select = heap work during the scan, delete)"""
+    import heapq, time
+    from .myTools import walk_entries
+    if order not in POLICY_ORDERS:
+        raise ValueError('unknown order {}, use one of {}'.format(order, POLICY_ORDERS))
+    limit = None if older_than_days is None else (time.time() if now is None else now) - older_than_days * 86400
+    report = {'scanned': 0, 'scanned_bytes': 0, 'files': 0, 'bytes': 0, 'aged': 0, 'quota': 0,
+              'remaining_bytes': 0, 'removed': [], 'errors': [],
+              'times': {'scan': 0.0, 'select': 0.0, 'delete': 0.0}}
+    doomed = []                             # (file, size)
+    keep, kept = [], 0                      # heap, top = most removable file that still fits
+    cutoff = None                           # least removable file pushed out so far
+    select = 0.0
+    start = time.perf_counter()
+    for entry in walk_entries(root, recursive, onerror=lambda error: report['errors'].append(
+            (error.filename, error.strerror))):
         try:
-            os.remove(soubor)
-        except (OSError, FileNotFoundError) as e:
-            print(f"Failed to remove {soubor}: {e}")
-    print('{} files removed'.format(len(keSmazani)))
+            info = entry.stat(follow_symlinks=False)
+        except OSError as error:
+            report['errors'].append((entry.path, error.strerror))
+            continue
+        report['scanned'] += 1
+        report['scanned_bytes'] += info.st_size
+        if limit is not None and info.st_mtime < limit:
+            report['aged'] += 1
+            doomed.append((entry.path, info.st_size))
+            continue
+        if max_bytes is None:
+            kept += info.st_size
+            continue
+        tick = time.perf_counter()
+        item = (info.st_mtime_ns if order == 'oldest' else -info.st_size, entry.path, info.st_size)
+        if cutoff is not None and item <= cutoff:   # more removable than something already out
+            report['quota'] += 1
+            doomed.append((entry.path, info.st_size))
+        else:
+            heapq.heappush(keep, item)
+            kept += info.st_size
+            while kept > max_bytes:
+                cutoff = heapq.heappop(keep)
+                kept -= cutoff[2]
+                report['quota'] += 1
+                doomed.append(cutoff[1:])
+        select += time.perf_counter() - tick
+    report['times']['scan'] = time.perf_counter() - start - select
+    report['times']['select'] = select
+    report['remaining_bytes'] = kept
+    start = time.perf_counter()
+    for path, size in doomed:
+        if not dry_run:
+            try:
+                os.unlink(path)
+            except OSError as error:
+                report['errors'].append((path, error.strerror))
+                report['remaining_bytes'] += size
+                continue
+        report['removed'].append((path, size))
+        report['files'] += 1
+        report['bytes'] += size
+    report['times']['delete'] = time.perf_counter() - start
+    return report
+
+
+__IN_MODIFY__ = 0x00000002             # inotify masks from <sys/inotify.h>
+__IN_CLOSE_WRITE__ = 0x00000008
+__IN_MOVED_TO__ = 0x00000080
+__IN_CREATE__ = 0x00000100
+__IN_DELETE__ = 0x00000200
+__IN_Q_OVERFLOW__ = 0x00004000
+__IN_IGNORED__ = 0x00008000
+__IN_ONLYDIR__ = 0x01000000
+__IN_DONT_FOLLOW__ = 0x02000000
+__IN_ISDIR__ = 0x40000000
+__TICK__ = 1.0          # how often the watch loop checks its stop event when idle
+
+
+class _InotifySource:
+    """Linux inotify through ctypes. wait() blocks in select, so an idle watch costs no CPU.
+    A matching file that was created or written to and not closed yet is busy: it is not
+    removed until its close-write event."""
+
+    def __init__(self):
+        flags = os.O_NONBLOCK | getattr(os, 'O_CLOEXEC', 0)    # AttributeError off Linux
+        import ctypes, ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._get_errno = ctypes.get_errno
+        self.fd = self._libc.inotify_init1(flags)
+        if self.fd < 0:
+            raise OSError(self._get_errno(), 'inotify_init1 failed')
+        self.watches = {}                   # watch descriptor -> directory
+        self.writing = {}                   # directory -> names written and not closed yet
+
+    def add(self, path):
+        mask = (__IN_CREATE__ | __IN_MODIFY__ | __IN_CLOSE_WRITE__ | __IN_MOVED_TO__ | __IN_DELETE__ |
+                __IN_ONLYDIR__ | __IN_DONT_FOLLOW__)
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            error = self._get_errno()
+            raise OSError(error, '{}: {}'.format(os.strerror(error), path))
+        self.watches[wd] = path
+
+    def busy(self, directory):
+        return self.writing.get(directory, ())
+
+    def wait(self, timeout, match):
+        """Returns set of directories with a matching file event and list of new directories."""
+        import select, struct
+        dirty, new_dirs = set(), []
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return dirty, new_dirs
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return dirty, new_dirs
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = struct.unpack_from('iIII', data, offset)
+                name = os.fsdecode(data[offset + 16:offset + 16 + length].rstrip(b'\0'))
+                offset += 16 + length
+                if mask & __IN_Q_OVERFLOW__:            # lost events, check everything
+                    dirty.update(self.watches.values())
+                elif mask & __IN_IGNORED__:             # directory removed
+                    self.writing.pop(self.watches.pop(wd, None), None)
+                elif wd in self.watches:
+                    directory = self.watches[wd]
+                    if mask & __IN_ISDIR__:
+                        if mask & (__IN_CREATE__ | __IN_MOVED_TO__):
+                            new_dirs.append(os.path.join(directory, name))
+                    elif match(name):
+                        if mask & (__IN_CREATE__ | __IN_MODIFY__):     # open until IN_CLOSE_WRITE
+                            self.writing.setdefault(directory, set()).add(name)
+                        elif mask & (__IN_CLOSE_WRITE__ | __IN_DELETE__):
+                            self.writing.get(directory, set()).discard(name)
+                        if not mask & __IN_DELETE__:
+                            dirty.add(directory)
+
+    def close(self):
+        os.close(self.fd)
 
+
+class _PollSource:
+    """Fallback without inotify: stats watched directories every interval seconds. Creating a
+    file changes the directory mtime, so a changed directory is reported as dirty. Size and
+    mtime of matching files in dirty directories are tracked until the files are gone, so
+    a file still being written keeps its directory dirty."""
+
+    def __init__(self, interval, stop):
+        self.interval = interval
+        self.stop = stop
+        self.mtimes = {}
+        self.files = {}                     # directory -> {name: (size, mtime_ns)} of matching files
+
+    def add(self, path):
+        self.mtimes[path] = os.stat(path).st_mtime_ns
+
+    def busy(self, directory):
+        return ()
+
+    def wait(self, timeout, match):
+        self.stop.wait(min(timeout, self.interval))
+        dirty, new_dirs = set(), []
+        for path, mtime in list(self.mtimes.items()):
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                del self.mtimes[path]
+                self.files.pop(path, None)
+                continue
+            if current == mtime and path not in self.files:
+                continue
+            self.mtimes[path] = current
+            files = {}
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if current != mtime and entry.path not in self.mtimes:
+                                new_dirs.append(entry.path)
+                        elif match(entry.name):
+                            info = entry.stat(follow_symlinks=False)
+                            files[entry.name] = (info.st_size, info.st_mtime_ns)
+            except OSError:
+                pass
+            if files != self.files.get(path, {}):
+                dirty.add(path)
+            if files:
+                self.files[path] = files
+            else:
+                self.files.pop(path, None)
+        return dirty, new_dirs
+
+    def close(self):
+        pass
+
+
+def watch_tree(root, patterns=DEFAULT_PATTERNS, debounce=2.0, stop=None, use_inotify=True,
+               poll_interval=5.0, dry_run=False):
+    """Watches root and all its subdirectories and removes matching files as they appear.
+    Generator of (directory, [(file, size), ...]) after every cleanup. Only create, write,
+    close-write and moved-to events of matching names count (inotify); every one of them
+    pushes the cleanup of its directory debounce seconds later, so files are left alone while
+    pdflatex keeps writing them. A file created or written to and not closed yet is not removed
+    even after a quiet period (inotify only, polling sees size and mtime changes). New
+    subdirectories are watched and cleaned too. Without inotify (not Linux, disabled, or out
+    of watches - see /proc/sys/fs/inotify/max_user_watches) directories are polled.
+    Existing files are not touched, run clean_tree first for that.
+    :param stop threading.Event ending the watch, checked at least once per second
+    :param use_inotify False = always poll
+    :param poll_interval seconds between polls in the fallback mode"""
+    import errno, threading, time
+    match = _matcher(patterns)
+    stop = threading.Event() if stop is None else stop
+    source = None
+    if use_inotify:
+        try:
+            source = _InotifySource()
+        except (OSError, AttributeError):   # not Linux
+            source = None
+    if source is None:
+        source = _PollSource(poll_interval, stop)
+    watched = []
+    deadlines = {}                          # directory -> monotonic time to clean it
+
+    def add_tree(top, mark_dirty):
+        nonlocal source
+        for directory, _, _ in os.walk(top):
+            try:
+                source.add(directory)
+            except OSError as error:
+                if error.errno != errno.ENOSPC or isinstance(source, _PollSource):
+                    continue                # vanished or unreadable directory
+                source.close()              # out of inotify watches, poll everything
+                source = _PollSource(poll_interval, stop)
+                for path in watched:
+                    source.add(path)
+                source.add(directory)
+            watched.append(directory)
+            if mark_dirty:
+                deadlines[directory] = time.monotonic() + debounce
+
+    add_tree(root, False)
+    try:
+        while not stop.is_set():
+            now = time.monotonic()
+            timeout = min(max(0.0, min(deadlines.values()) - now), __TICK__) if deadlines else __TICK__
+            dirty, new_dirs = source.wait(timeout, match)
+            for directory in new_dirs:
+                add_tree(directory, True)   # files may have been created before the watch
+            now = time.monotonic()
+            for directory in dirty:
+                deadlines[directory] = now + debounce
+            for directory, deadline in list(deadlines.items()):
+                if deadline <= now:
+                    del deadlines[directory]
+                    busy = source.busy(directory)
+                    _, removed, _ = _clean_dir(directory, (lambda name: match(name) and name not in busy)
+                                               if busy else match, dry_run)
+                    if removed:
+                        yield directory, removed
+    finally:
+        source.close()
+
+
+def prepare_arguments(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Removes LaTeX auxiliary files.')
+    parser.add_argument('adresare', nargs='*', default=[__path__], help='directories to clean')
+    parser.add_argument('--pattern', action='append', default=None,
+                        help='file name pattern, can be repeated (default {})'.format(' '.join(DEFAULT_PATTERNS)))
+    parser.add_argument('--recursive', action='store_true', help='clean subdirectories too')
+    parser.add_argument('--dry-run', action='store_true', help='only report what would be removed')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--watch', action='store_true', help='after cleaning keep watching (inotify) and remove '
+                                                             'new files, implies --recursive')
+    parser.add_argument('--max-size', type=parse_size, default=None,
+                        help='policy mode: keep each directory tree under this size (e.g. 500M, 10G)')
+    parser.add_argument('--older-than', type=float, default=None, metavar='DAYS',
+                        help='policy mode: remove all files older than DAYS')
+    parser.add_argument('--order', choices=POLICY_ORDERS, default='oldest',
+                        help='which files go first to meet --max-size')
+    parser.add_argument('--debounce', type=float, default=2.0, help='seconds of quiet before a watched '
+                                                                   'directory is cleaned')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    argumenty = prepare_arguments()
+    for cesta in argumenty.adresare:
+        print(cesta)
+        if argumenty.max_size is not None or argumenty.older_than is not None:
+            vysledek = apply_policy(cesta, argumenty.max_size, argumenty.older_than, argumenty.order,
+                                    argumenty.dry_run)
+            for soubor, velikost in vysledek['removed']:
+                print('{}  {}'.format(velikost, soubor))
+            for soubor, chyba in vysledek['errors']:
+                print(f"Failed to remove {soubor}: {chyba}")
+            print('{} of {} files {}removed ({} by age, {} by quota), {} bytes reclaimed, {} bytes left'.format(
+                vysledek['files'], vysledek['scanned'], 'would be ' if argumenty.dry_run else '',
+                vysledek['aged'], vysledek['quota'], vysledek['bytes'], vysledek['remaining_bytes']))
+            print('scan {scan:.3f} s, select {select:.3f} s, delete {delete:.3f} s'.format(**vysledek['times']))
+            continue
+        vysledek = clean_tree(cesta, argumenty.pattern or DEFAULT_PATTERNS, argumenty.dry_run,
+                              argumenty.workers, argumenty.recursive or argumenty.watch)
+        for soubor, velikost in vysledek['removed']:
+            print('{}  {}'.format(velikost, soubor))
+        for soubor, chyba in vysledek['errors']:
+            print(f"Failed to remove {soubor}: {chyba}")
+        print('{} files {}removed, {} bytes, {} directories'.format(
+            vysledek['files'], 'would be ' if argumenty.dry_run else '', vysledek['bytes'], vysledek['dirs']))
+    if argumenty.watch:
+        import threading
+        konec = threading.Event()
+
+        def hlidej(cesta):
+            for _, smazane in watch_tree(cesta, argumenty.pattern or DEFAULT_PATTERNS, argumenty.debounce,
+                                         konec, dry_run=argumenty.dry_run):
+                for soubor, velikost in smazane:
+                    print('{}  {}'.format(velikost, soubor), flush=True)
+
+        for cesta in argumenty.adresare:
+            threading.Thread(target=hlidej, args=(cesta,), daemon=True).start()
+        try:
+            konec.wait()
+        except KeyboardInterrupt:
+            konec.set()
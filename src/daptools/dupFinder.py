@@ -0,0 +1,219 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+dupFinder - hleda duplicitni files (hudba, fotky) ve trech krocich, aby se cetlo co nejmene dat:
+1. jednim pruchodem scandir seskupi files podle velikosti, unikatni velikosti vypadnou,
+2. ve skupinach porovna levny hash zacatku a konce file,
+3. teprve zbyle kandidaty zahashuje cele pres generateSHA.
+Vysledek jsou skupiny duplicit jako JSON, volitelne je nahradi hardlinky nebo smaze.
+Created on 18/10/2026, 11:20
+
+@author: David Potucek
+"""
+
+import os
+
+from .generateSHA import create_hash, new_hash
+
+PARTIAL_BLOCK = 64 * 1024       # kolik bytu ze zacatku a konce file bere 2. krok
+
+
+def _scan_sizes(roots, min_size=1):
+    """Jednim pruchodem walk_entries posbira files podle velikosti. Vrati slovnik velikost -> cesty
+    jen pro velikosti, ktere ma vic files, slovnik cesta -> razitko (viz _stamp) a celkovy pocet
+    a objem files. Dalsi hardlink na uz videny inode se preskoci, neni to duplicita, ale tentyz file."""
+    from .myTools import walk_entries
+    groups = {}
+    stamps = {}
+    seen = set()
+    count = total = 0
+    for root in roots:
+        for entry in walk_entries(root):
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                info = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if info.st_size < min_size or (info.st_dev, info.st_ino) in seen:
+                continue
+            seen.add((info.st_dev, info.st_ino))
+            count += 1
+            total += info.st_size
+            groups.setdefault(info.st_size, []).append(entry.path)
+            stamps[entry.path] = _stamp(info)
+    return {size: paths for size, paths in groups.items() if len(paths) > 1}, stamps, count, total
+
+
+def _stamp(info):
+    """Razitko file ze stat: zarizeni, inode a mtime v ns. Seznam, aby prezil JSON."""
+    return [info.st_dev, info.st_ino, info.st_mtime_ns]
+
+
+def _unchanged(path, group):
+    """Je file porad ten, ktery find_duplicates nasel? Porovna velikost a razitko; skupiny bez
+    razitek (napr. ze stareho JSON) jen velikost. Smazany nebo necitelny file je zmeneny."""
+    try:
+        info = os.stat(path, follow_symlinks=False)
+    except OSError:
+        return False
+    if info.st_size != group['size']:
+        return False
+    stamps = group.get('stamps')
+    return stamps is None or stamps.get(path) == _stamp(info)
+
+
+def partial_digest(path, size, block=PARTIAL_BLOCK, typex='sha256sum'):
+    """Hash prvniho a posledniho bloku file. U files do 2 bloku je to hash celeho obsahu.
+    Vrati hexdigest a pocet prectenych bytu."""
+    h = new_hash(typex)
+    with open(path, 'rb') as fh:
+        if size <= 2 * block:
+            data = fh.read()
+            h.update(data)
+            return h.hexdigest(), len(data)
+        head = fh.read(block)
+        fh.seek(-block, os.SEEK_END)
+        tail = fh.read(block)
+    h.update(head)
+    h.update(tail)
+    return h.hexdigest(), len(head) + len(tail)
+
+
+def _refine(groups, key_func):
+    """Kazdou skupinu (velikost, klic, cesty) rozdeli podle noveho klice z key_func(velikost,
+    klic, cesty) a necha jen podskupiny s vic nez jednim file. Cesty s klicem None vypadnou."""
+    result = []
+    for size, key, paths in groups:
+        buckets = {}
+        for path, new_key in zip(paths, key_func(size, key, paths)):
+            if new_key is not None:
+                buckets.setdefault(new_key, []).append(path)
+        result.extend((size, k, b) for k, b in buckets.items() if len(b) > 1)
+    return result
+
+
+def find_duplicates(roots, min_size=1, typex='sha256sum', workers=4, block=PARTIAL_BLOCK, cache=None,
+                    stats=None):
+    """Najde skupiny stejnych files pod danymi adresari.
+    :param roots adresar nebo seznam adresaru
+    :param min_size mensi files se ignoruji (default vynecha prazdne)
+    :param typex typ hashe pro 2. i 3. krok
+    :param workers pocet vlaken pro 2. a 3. krok
+    :param cache HashCache pro plne hashe
+    :param stats slovnik, do ktereho se doplni pocty files a prectene byty po krocich
+    :return seznam slovniku {'size', 'digest', 'files', 'stamps'} serazeny od nejvetsi usetritelne
+        kapacity, stamps je cesta -> razitko ze skenovani pro kontrolu pred link/delete"""
+    from concurrent.futures import ThreadPoolExecutor
+    roots = [roots] if isinstance(roots, str) else list(roots)
+    by_size, stamps, count, total = _scan_sizes(roots, min_size)
+    read = {'partial_read': 0, 'full_read': 0}
+
+    def partial(size, _, paths):
+        results = list(pool.map(lambda p: _safe(partial_digest, p, size, block, typex), paths))
+        read['partial_read'] += sum(r[1] for r in results if r is not None)
+        return [None if r is None else r[0] for r in results]
+
+    def full(size, key, paths):
+        if size <= 2 * block:           # 2. krok uz zahashoval cely obsah
+            return [key] * len(paths)
+        results = list(pool.map(lambda p: _safe(create_hash, p, typex, cache=cache), paths))
+        read['full_read'] += size * sum(1 for r in results if r is not None)
+        return [None if r is None else r[0].hexdigest() for r in results]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        candidates = _refine([(size, None, paths) for size, paths in by_size.items()], partial)
+        duplicates = _refine(candidates, full)
+    if stats is not None:
+        stats.update({'files': count, 'bytes': total,
+                      'size_candidates': sum(len(p) for p in by_size.values()),
+                      'partial_candidates': sum(len(p) for _, _, p in candidates),
+                      'duplicates': sum(len(p) - 1 for _, _, p in duplicates)})
+        stats.update(read)
+    result = [{'size': size, 'digest': digest, 'files': sorted(paths), 'stamps': {p: stamps[p] for p in paths}}
+              for size, digest, paths in duplicates]
+    result.sort(key=lambda g: g['size'] * (len(g['files']) - 1), reverse=True)
+    return result
+
+
+def _safe(func, *args, **kwargs):
+    """Zavola funkci; file, ktery mezitim zmizel nebo nejde cist, vrati None."""
+    try:
+        return func(*args, **kwargs)
+    except OSError:
+        return None
+
+
+def link_duplicates(groups, dry_run=False):
+    """Vsechny files skupiny krome prvniho nahradi hardlinkem na prvni. Nejdriv vytvori link
+    pod docasnym jmenem a pak ho atomicky prejmenuje na duplicitu. Files na jinem filesystemu
+    nebo zmenene od hledani (velikost, inode, mtime) preskoci, zmeneny prvni preskoci celou skupinu.
+    :return seznam dvojic (akce, file), akce je 'link', nebo 'skip'"""
+    done = []
+    for group in groups:
+        keep = group['files'][0]
+        keep_ok = _unchanged(keep, group)
+        for path in group['files'][1:]:
+            if not (keep_ok and _unchanged(path, group)):
+                done.append(('skip', path))
+                continue
+            if not dry_run:
+                tmp = path + '.duplink'
+                try:
+                    os.link(keep, tmp)
+                    os.replace(tmp, path)
+                except OSError:
+                    if os.path.lexists(tmp):
+                        os.remove(tmp)
+                    done.append(('skip', path))
+                    continue
+            done.append(('link', path))
+    return done
+
+
+def delete_duplicates(groups, dry_run=False):
+    """Smaze vsechny files skupiny krome prvniho. Files zmenene od hledani preskoci, zmeneny
+    prvni preskoci celou skupinu, aby nezustala zadna kopie.
+    :return seznam dvojic (akce, file), akce je 'delete', nebo 'skip'"""
+    done = []
+    for group in groups:
+        keep_ok = _unchanged(group['files'][0], group)
+        for path in group['files'][1:]:
+            if not (keep_ok and _unchanged(path, group)):
+                done.append(('skip', path))
+                continue
+            try:
+                if not dry_run:
+                    os.remove(path)
+            except OSError:
+                done.append(('skip', path))
+                continue
+            done.append(('delete', path))
+    return done
+
+
+def prepare_arguments(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Najde duplicitni files a vypise je jako JSON.')
+    parser.add_argument('adresare', nargs='+')
+    parser.add_argument('--min-size', type=int, default=1, help='mensi files ignorovat')
+    parser.add_argument('--type', default='sha256sum', help='typ hashe pro porovnani celych files')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--link', action='store_true', help='duplicity nahradit hardlinky')
+    parser.add_argument('--delete', action='store_true', help='duplicity smazat, necha prvni z kazde skupiny')
+    parser.add_argument('--dry-run', action='store_true', help='u --link/--delete jen vypsat, co by se stalo')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    import json
+    argumenty = prepare_arguments()
+    statistika = {}
+    skupiny = find_duplicates(argumenty.adresare, argumenty.min_size, argumenty.type, argumenty.workers,
+                              stats=statistika)
+    vystup = {'groups': skupiny, 'stats': statistika}
+    if argumenty.link:
+        vystup['actions'] = link_duplicates(skupiny, argumenty.dry_run)
+    elif argumenty.delete:
+        vystup['actions'] = delete_duplicates(skupiny, argumenty.dry_run)
+    print(json.dumps(vystup, indent=2))
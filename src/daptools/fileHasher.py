@@ -12,10 +12,10 @@ Created on 27/04/2017, 07:26
 
 import random
 
-from .myTools import tree_walker, separate_full_path, rename_files, prepare_counter, strip_czech_chars
+from .myTools import walk_entries, separate_full_path, rename_files, prepare_counter, strip_czech_cached
 
 __PATH = '/Users/david/temp/mp3'
-__IGNORE_NAMES__ = ('.DS_Store')    # ktere files vynechat
+__IGNORE_NAMES__ = frozenset(('.DS_Store',))    # ktere files vynechat
 __REPLACE_CHARS__ = ('.', ' ', '-', '_') # ktere znaky vynechat na zacatku filename
 
 def strip_first_alphanumeric(file_name, position=6):
@@ -25,7 +25,7 @@ def strip_first_alphanumeric(file_name, position=6):
     :param position - kolik znaku na zacatku prohledavat
     :return  nove jmeno"""
     import sys
-    file_name = strip_czech_chars(file_name)
+    file_name = strip_czech_cached(file_name)
     try:
         index = file_name.rindex('.')    # najdu priponu
     except ValueError:
@@ -39,30 +39,49 @@ def strip_first_alphanumeric(file_name, position=6):
     result = result + rest_str + ext
     return result
 
-def hash_names(f_names, randomize = 0):
+def hash_names(f_names, randomize=0, seed=None):
     '''k danemu seznamu files vyrobi dictionary se starym a novym filename
-    serazene nahodne.
+    serazene nahodne. Files z ruznych adresaru se cisluji v kazdem adresari zvlast.
     :param f_names name tuple (full path)
     :param randomize switch 0 means randomize, anything else - no change of order
+    :param seed seed pro random.Random, stejny seed = stejne poradi
     :return dictionary of old and new file names (full path)'''
-    counter = 1
-    l = list(f_names)
-    new_names = {}
-
-    directory_path = validate_files(l)
-
-    while len(l) > 0:       # samotna funkce zpracovani file name
-        if randomize == 0:
-            element = random.choice(l)
-        else:
-            element = l[counter]
-        _, name = separate_full_path(element)
-        name_r = strip_first_alphanumeric(name)
-        name_new = directory_path + prepare_counter(counter) + '-' + name_r
-        new_names[element] = name_new
-        l.remove(element)
-        counter += 1
-    return new_names
+    return dict(plan_hash_names(f_names, randomize, seed))
+
+
+def plan_hash_names(f_names, randomize=0, seed=None):
+    '''Generator dvojic (stare, nove jmeno) pro hash_names. Files se rozdeli podle adresare,
+    kazdy adresar se jednou zamicha (Fisher-Yates pres random.Random.shuffle) a ocisluje od 1.
+    Cislo ma aspon 3 mista, u adresare s vic files tolik, aby poradi sedelo i pri razeni podle jmena.'''
+    groups = {}
+    for path, directory, name in _valid_names(f_names):
+        groups.setdefault(directory, []).append((path, name))
+    rng = random.Random(seed)
+    for directory, files in groups.items():
+        for pair in _number_directory(directory, files, randomize, rng):
+            yield pair
+
+
+def plan_library(root, randomize=0, seed=None):
+    '''Jako plan_hash_names, ale pro celou knihovnu pod adresarem root vcetne podadresaru.
+    Strom se prochazi prubezne (walk_entries vraci files adresare pohromade), v pameti je vzdy
+    jen jeden adresar, takze plan jde rovnou predavat dal bez cekani na cely strom.'''
+    from itertools import groupby
+    rng = random.Random(seed)
+    files = _valid_names(entry.path for entry in walk_entries(root))
+    for directory, group in groupby(files, key=lambda item: item[1]):
+        for pair in _number_directory(directory, [(path, name) for path, _, name in group], randomize, rng):
+            yield pair
+
+
+def _number_directory(directory, files, randomize, rng):
+    """Zamicha (randomize == 0) a ocisluje files jednoho adresare, files jsou dvojice (cesta, jmeno)."""
+    if randomize == 0:
+        rng.shuffle(files)
+    places = max(3, len(str(len(files))))
+    for counter, (element, name) in enumerate(files, 1):
+        yield element, directory + prepare_counter(counter, places) + '-' + strip_first_alphanumeric(name)
+
 
 def remove_numbers_from_files(f_names):
     ''' Projde dodany list souboru, zvaliduje jejich jmena a vyjme numericke znaky na
@@ -70,40 +89,30 @@ def remove_numbers_from_files(f_names):
     :param f_names file names tuple (full path)
     :return dictionary of old and new file names (full path)
     '''
-    l = list(f_names)
-    new_names = {}
+    return {element: directory + strip_first_alphanumeric(name) for element, directory, name in _valid_names(f_names)}
+
 
-    directory_path = validate_files(l)
-    while len(l) > 0:
-        element = l[0]
-        _, name = separate_full_path(element)
-        name_strip = strip_first_alphanumeric(name)
-        name_new = directory_path + name_strip
-        new_names[element] = name_new
-        l.remove(element)
-    return new_names
+def _valid_names(f_names):
+    """Generator trojic (cesta, adresar, jmeno) pro files, ktere maji priponu a nejsou
+    v __IGNORE_NAMES__."""
+    for nam in f_names:
+        directory, n = separate_full_path(nam)
+        if '.' in n and n not in __IGNORE_NAMES__:
+            yield nam, directory, n
 
 
 def validate_files(l):
     '''Rutina zkontroluje jestli soubor ma priponu a jestli neni v ignorovanych.
     :return directoryPath je full path k danym souborum
     Pozor! modifikuje list l bez toho aby ho vracel!'''
-    for nam in l:
-        _, n = separate_full_path(nam)
-        try:
-            _ = n.rindex('.')  # najdu priponu
-        except ValueError:        # if nema priponu, vyhodim ho
-            l.remove(nam)
-            continue
-        if n in __IGNORE_NAMES__:   # if je v ignorovanych files, vyhodim ho
-            l.remove(nam)
+    l[:] = [nam for nam, _, _ in _valid_names(l)]      # jeden pruchod misto remove() pri iteraci
     print('z toho {} platnych'.format(len(l)))
     directory_path, _ = separate_full_path(l[0])  # pripravim si path
     return directory_path
 
 
 if __name__ == "__main__":
-    l = tree_walker(__PATH, False)
+    l = tuple(entry.path for entry in walk_entries(__PATH, False))
     print('nacteno {} files.'.format(len(l)))
     new_names = remove_numbers_from_files(l)        # tohle odstrani ciselne prefixy
     new_names = hash_names(l)                   # tohle zahashuje soubory podle cisel
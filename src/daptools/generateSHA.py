@@ -7,107 +7,962 @@ Created on 24/02/2021, 07:26
 @author: David Potucek
 """
 
-import sys, hashlib
+import sys, os, re, stat, mmap, time, threading, hashlib
 from collections import OrderedDict as od
 
 SHA_TYPES = ['md5sum', 'sha1sum', 'sha224sum', 'sha256sum', 'sha384sum', 'sha512sum']
+EXTRA_TYPES = ['blake2bsum', 'blake2ssum', 'sha3_224sum', 'sha3_256sum', 'sha3_384sum', 'sha3_512sum']
+ALL_TYPES = SHA_TYPES + EXTRA_TYPES
 
-def get_hashsums(file_path):
-    """Vypocte hash vsech typu pro dany file."""
-    hash_sums = od()
-    hash_sums['md5sum'] = hashlib.md5()
-    hash_sums['sha1sum'] = hashlib.sha1()
-    hash_sums['sha224sum'] = hashlib.sha224()
-    hash_sums['sha256sum'] = hashlib.sha256()
-    hash_sums['sha384sum'] = hashlib.sha384()
-    hash_sums['sha512sum'] = hashlib.sha512()
-    with open(file_path, 'rb') as fd:
-        data_chunk = fd.read(1024)
-        while data_chunk:
-              for hashsum in hash_sums.keys():
-                  hash_sums[hashsum].update(data_chunk)
-              data_chunk = fd.read(1024)
+DEFAULT_BUFFER_SIZE = 1024 * 1024       # 1 MiB; mene volani pythonu na GB dat
+ORDERS = ('walk', 'inode', 'physical')  # poradi cteni files v hash_tree
 
-    results = od()
-    for key,value in hash_sums.items():
-         results[key] = value.hexdigest()
-    return results
+__HASH_MAP__ = {
+    'md5sum': hashlib.md5,
+    'sha1sum': hashlib.sha1,
+    'sha224sum': hashlib.sha224,
+    'sha256sum': hashlib.sha256,
+    'sha384sum': hashlib.sha384,
+    'sha512sum': hashlib.sha512,
+    'blake2bsum': hashlib.blake2b,
+    'blake2ssum': hashlib.blake2s,
+    'sha3_224sum': hashlib.sha3_224,
+    'sha3_256sum': hashlib.sha3_256,
+    'sha3_384sum': hashlib.sha3_384,
+    'sha3_512sum': hashlib.sha3_512
+}
+
+__DIGEST_LENGTHS__ = {32: 'md5sum', 40: 'sha1sum', 56: 'sha224sum', 64: 'sha256sum',
+                      96: 'sha384sum', 128: 'sha512sum'}      # typ hashe podle delky hexdigestu
+__BSD_TAGS__ = {'MD5': 'md5sum', 'SHA1': 'sha1sum', 'SHA224': 'sha224sum', 'SHA256': 'sha256sum',
+                'SHA384': 'sha384sum', 'SHA512': 'sha512sum', 'BLAKE2B': 'blake2bsum', 'BLAKE2S': 'blake2ssum',
+                'SHA3-224': 'sha3_224sum', 'SHA3-256': 'sha3_256sum', 'SHA3-384': 'sha3_384sum',
+                'SHA3-512': 'sha3_512sum'}
+__FS_IOC_FIEMAP__ = 0xC020660B                  # _IOWR('f', 11, struct fiemap), Linux
+__FIEMAP_HEADER__ = '=QQIIII'                   # fm_start, fm_length, fm_flags, fm_mapped_extents, ...
+__FIEMAP_EXTENT_SIZE__ = 56                     # struct fiemap_extent
+__GNU_LINE__ = re.compile(r'^([0-9a-fA-F]+) [ *](.+)$')
+__BSD_LINE__ = re.compile(r'^([A-Za-z0-9_-]+) \((.+)\) = ([0-9a-fA-F]+)$')
+
+# velikosti pro benchmark: jmeno -> (velikost jednoho file, pocet files)
+BENCH_SIZES = od([
+    ('small', (4 * 1024, 500)),
+    ('medium', (16 * 1024 * 1024, 4)),
+    ('huge', (1024 * 1024 * 1024, 1))
+])
 
-def create_hash(file, type="sha256sum"):
-    """Vytvori podle typu hash objekt a napocita hash. Default type je sha256."""
-    hash_map = {
-        'md5sum': hashlib.md5,
-        'sha1sum': hashlib.sha1,
-        'sha224sum': hashlib.sha224,
-        'sha256sum': hashlib.sha256,
-        'sha384sum': hashlib.sha384,
-        'sha512sum': hashlib.sha512
-    }
-    
-    if type not in hash_map:
+
+def new_hash(type="sha256sum"):
+    """Vrati novy hash objekt daneho typu. Neznamy typ hodi ValueError."""
+    if type not in __HASH_MAP__:
         raise ValueError('neplatny typ hashe')
-    
-    hash_sum = hash_map[type]()
-
-    with open(file, 'rb') as fh:            # projedeme file a vyrobime spravny hash
-        data_chunk = fh.read(1024)
-        while data_chunk:
-            hash_sum.update(data_chunk)
-            data_chunk = fh.read(1024)
+    return __HASH_MAP__[type]()
+
+
+def _new_hashers(types):
+    """Vyrobi OrderedDict typ -> novy hash objekt. Neznamy typ hodi ValueError."""
+    hashers = od()
+    for typ in types:
+        hashers[typ] = new_hash(typ)
+    return hashers
+
+
+class HashProgress:
+    """Sleduje prubeh hashovani: prectene byty, hotove files, aktualni MB/s a ETA. Predava se jako
+    progress= do create_hash, get_hashsums, hash_tree a check_manifest; bez nej se nic nepocita.
+    callback(progress) se vola nejvys jednou za interval sekund a na konci z finish().
+    Lze sdilet mezi vlakny. total_bytes/total_files muze doplnit volajici nebo check_manifest,
+    bez nich neni ETA."""
+
+    def __init__(self, callback=None, interval=1.0, total_bytes=None, total_files=None):
+        self.callback = callback
+        self.interval = interval
+        self.total_bytes = total_bytes
+        self.total_files = total_files
+        self.bytes = 0
+        self.files = 0
+        self.failed = 0
+        self.rate = 0.0                 # MB/s za posledni interval
+        self.started = time.monotonic()
+        self.finished = None
+        self._lock = threading.Lock()
+        self._mark = (self.started, 0)  # cas a byty pri poslednim hlaseni
+
+    def add_bytes(self, count):
+        with self._lock:
+            self.bytes += count
+        self._tick()
+
+    def file_done(self, count=0, failed=False):
+        """Zapocita hotovy file; count jsou jeho byty, pokud se neposilaly pres add_bytes."""
+        with self._lock:
+            self.bytes += count
+            self.files += 1
+            self.failed += bool(failed)
+        self._tick()
+
+    def _tick(self, force=False):
+        now = time.monotonic()
+        with self._lock:
+            then, done = self._mark
+            if not force and now - then < self.interval:
+                return
+            if now > then:
+                self.rate = (self.bytes - done) / (now - then) / 1e6
+            self._mark = (now, self.bytes)
+        if self.callback is not None:
+            self.callback(self)
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def average_rate(self):
+        """Prumerna propustnost v MB/s od zacatku."""
+        return self.bytes / self.elapsed / 1e6 if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self):
+        """Odhad zbyvajicich sekund, nebo None kdyz neni znamy celkovy objem."""
+        if self.total_bytes is None:
+            return None
+        rate = self.rate or self.average_rate
+        if rate <= 0:
+            return None
+        return max(0.0, (self.total_bytes - self.bytes) / rate / 1e6)
+
+    def finish(self):
+        self.finished = time.monotonic()
+        self._tick(force=True)
+
+    def as_dict(self):
+        """Statistika pro strojove zpracovani (JSON)."""
+        return {'bytes': self.bytes, 'files': self.files, 'failed': self.failed,
+                'total_bytes': self.total_bytes, 'total_files': self.total_files,
+                'seconds': round(self.elapsed, 3), 'mb_per_s': round(self.average_rate, 3)}
+
+    def dump(self, path):
+        """Zapise as_dict() jako JSON do file."""
+        import json
+        with open(path, 'w') as fh:
+            json.dump(self.as_dict(), fh, indent=2)
+
+    def __str__(self):
+        eta = self.eta
+        return '{} files, {:.1f} MB, {:.1f} MB/s{}'.format(
+            self.files, self.bytes / 1e6, self.rate or self.average_rate,
+            '' if eta is None else ', ETA {:.0f} s'.format(eta))
+
+
+def _feed_file(file_path, hashers, buffer_size=DEFAULT_BUFFER_SIZE, use_mmap=False, parallel=False,
+               progress=None, fadvise=False):
+    """Projede file a kazdy blok preda vsem hash objektum. Cte pres readinto do jednoho
+    znovupouzivaneho bufferu, bez kopirovani dat. S use_mmap namapuje bezny neprazdny file
+    do pameti a hashuje primo z nej; jinak (roura, prazdny file) se pouzije buffer.
+    S parallel bezi kazdy hash objekt ve vlastnim vlakne (viz _feed_parallel).
+    progress (HashProgress) dostava pocet bytu po kazdem bloku. S fadvise poradi jadru sekvencni
+    cteni (vetsi readahead) a po precteni stranky file z page cache zahodi."""
+    if buffer_size < 1:
+        raise ValueError('buffer_size musi byt kladny')
+    updates = [h.update for h in hashers]
+    parallel = parallel and len(updates) > 1
+    if progress is not None:
+        updates.append(lambda chunk: progress.add_bytes(len(chunk)))
+    with open(file_path, 'rb', buffering=0) as fd:
+        if fadvise and hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            try:
+                _feed_open_file(fd, updates, buffer_size, use_mmap, parallel)
+            finally:
+                os.posix_fadvise(fd.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        else:
+            _feed_open_file(fd, updates, buffer_size, use_mmap, parallel)
+
+
+def _feed_open_file(fd, updates, buffer_size, use_mmap, parallel):
+    """Telo _feed_file nad uz otevrenym file."""
+    if use_mmap:
+        info = os.fstat(fd.fileno())
+        if stat.S_ISREG(info.st_mode) and info.st_size > 0:
+            with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                if parallel:
+                    _feed_parallel((view[o:o + buffer_size] for o in range(0, len(view), buffer_size)),
+                                   updates)
+                    return
+                for offset in range(0, len(view), buffer_size):
+                    with view[offset:offset + buffer_size] as chunk:
+                        for update in updates:
+                            update(chunk)
+            return
+    if parallel:
+        _feed_parallel(_read_chunks(fd, buffer_size), updates)
+    else:
+        _feed_readinto(fd, updates, buffer_size)
+
+
+def _read_chunks(fd, buffer_size):
+    """Generator bloku ze streamu, ctenych stridave do dvou bufferu. Blok tak zustava platny
+    i behem cteni nasledujiciho bloku."""
+    views = (memoryview(bytearray(buffer_size)), memoryview(bytearray(buffer_size)))
+    current = 0
+    n = fd.readinto(views[current])
+    while n:
+        yield views[current][:n]
+        current ^= 1
+        n = fd.readinto(views[current])
+
+
+def _feed_parallel(chunks, updates):
+    """Kazdy blok preda vsem funkcim v updates soubezne, kazde ve vlastnim vlakne - hashlib
+    u velkych bloku uvolnuje GIL, takze vsechny typy bezi naraz a celek trva zhruba jako
+    nejpomalejsi z nich. Dalsi blok se cte, zatimco se hashuje predchozi. Stejny hash objekt
+    musi dostat bloky po poradi, proto se pred odeslanim bloku ceka na dokonceni predchoziho."""
+    from concurrent.futures import ThreadPoolExecutor
+    pending = []
+    with ThreadPoolExecutor(max_workers=len(updates)) as pool:
+        for chunk in chunks:
+            for future in pending:
+                future.result()
+            pending = [pool.submit(update, chunk) for update in updates]
+        for future in pending:
+            future.result()
+
+
+def _feed_readinto(fd, updates, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Cte stream pres readinto do jednoho bufferu a kazdy blok preda vsem funkcim v updates."""
+    buf = bytearray(buffer_size)
+    with memoryview(buf) as view:
+        n = fd.readinto(buf)
+        while n:
+            with view[:n] as chunk:
+                for update in updates:
+                    update(chunk)
+            n = fd.readinto(buf)
+
+
+def _write_all(destination):
+    """Vrati funkci, ktera zapise cely blok do destination i pri castecnem zapisu (raw files)."""
+    def write(chunk):
+        written = destination.write(chunk)
+        while written is not None and written < len(chunk):
+            chunk = chunk[written:]
+            written = destination.write(chunk)
+    return write
+
+
+def hash_stream(source, algorithms=('sha256sum',), destination=None, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Spocita hashe dat ze streamu jednim pruchodem, bez nacteni vseho do pameti a bez docasneho
+    file. source je binarni file-like objekt (readinto nebo read - roura, socket.makefile('rb'),
+    zipfile/gzip stream) nebo iterovatelne bloky bytes. S destination (objekt s write) data
+    zaroven kopiruje, takze napr. stahovany file se zapise i overi bez druheho cteni.
+    :param algorithms typ nebo seznam typu z ALL_TYPES
+    :return OrderedDict typ -> hexdigest"""
+    types = [algorithms] if isinstance(algorithms, str) else list(algorithms)
+    hashers = _new_hashers(types)
+    updates = [h.update for h in hashers.values()]
+    if destination is not None:
+        updates.append(_write_all(destination))
+    if hasattr(source, 'readinto'):
+        _feed_readinto(source, updates, buffer_size)
+    else:
+        chunks = iter(lambda: source.read(buffer_size), b'') if hasattr(source, 'read') else source
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                raise TypeError('hash_stream potrebuje bytes, ne text')
+            for update in updates:
+                update(chunk)
+    return od((typ, h.hexdigest()) for typ, h in hashers.items())
+
+
+def _cache_lookup(cache, file_path, types):
+    """Vrati os.stat file a OrderedDict typ -> hexdigest tech typu, ktere uz jsou v cache."""
+    info = os.stat(file_path)
+    found = od()
+    for typ in types:
+        digest = cache.get(info, typ)
+        if digest is not None:
+            found[typ] = digest
+    return info, found
+
+
+def _cache_store(cache, file_path, info, digests):
+    """Ulozi hashe do cache - jen pokud se file behem cteni nezmenil."""
+    after = os.stat(file_path)
+    if (after.st_dev, after.st_ino, after.st_size, after.st_mtime_ns) == \
+            (info.st_dev, info.st_ino, info.st_size, info.st_mtime_ns):
+        for typ, digest in digests.items():
+            cache.put(info, typ, digest)
+
+
+def get_hashsums(file_path, buffer_size=DEFAULT_BUFFER_SIZE, use_mmap=False, cache=None, parallel=False,
+                 types=None, progress=None):
+    """Vypocte hash vsech typu pro dany file (default SHA_TYPES, lze zadat jiny seznam typu).
+    File se cte jen jednou.
+    :param buffer_size velikost bloku cteni v bytech
+    :param use_mmap cist velke bezne files pres mmap
+    :param cache HashCache; typy nalezene v cache se nepocitaji
+    :param parallel kazdy typ pocitat ve vlastnim vlakne; vyplati se u velkych files
+    :param progress HashProgress pro sledovani prubehu"""
+    types = SHA_TYPES if types is None else types
+    results = od()
+    if cache is not None:
+        info, results = _cache_lookup(cache, file_path, types)
+    missing = [typ for typ in types if typ not in results]
+    if missing:
+        hash_sums = _new_hashers(missing)
+        _feed_file(file_path, hash_sums.values(), buffer_size, use_mmap, parallel, progress)
+        computed = od()
+        for key,value in hash_sums.items():
+             computed[key] = value.hexdigest()
+        if cache is not None:
+            _cache_store(cache, file_path, info, computed)
+        results.update(computed)
+    if progress is not None:
+        progress.file_done()
+    return od((typ, results[typ]) for typ in types)
+
+def create_hash(file, type="sha256sum", buffer_size=DEFAULT_BUFFER_SIZE, use_mmap=False, cache=None,
+                progress=None):
+    """Vytvori podle typu hash objekt a napocita hash. Default type je sha256.
+    S cache (HashCache) vrati pro nezmeneny file CachedDigest, ktery umi hexdigest() a digest().
+    progress (HashProgress) sleduje prubeh."""
+    hash_sum = _new_hashers([type])[type]
+    if cache is not None:
+        from .hashCache import CachedDigest
+        info, found = _cache_lookup(cache, file, [type])
+        if found:
+            if progress is not None:
+                progress.file_done()
+            return CachedDigest(type, found[type]), type
+    _feed_file(file, [hash_sum], buffer_size, use_mmap, progress=progress)   # projedeme file a vyrobime spravny hash
+    if cache is not None:
+        _cache_store(cache, file, info, {type: hash_sum.hexdigest()})
+    if progress is not None:
+        progress.file_done()
     return hash_sum, type
 
 
-def validate_file (file, signature, typex="sha256sum"):
+def _hash_file(file_path, types, buffer_size=DEFAULT_BUFFER_SIZE, use_mmap=False, progress=None, fadvise=False):
+    """Worker pro hash_tree. Vrati file a OrderedDict typ -> hexdigest."""
+    hashers = _new_hashers(types)
+    _feed_file(file_path, hashers.values(), buffer_size, use_mmap, progress=progress, fadvise=fadvise)
+    return file_path, od((typ, h.hexdigest()) for typ, h in hashers.items())
+
+
+def _run_bounded(pool, tasks, limit):
+    """Odesila do poolu ulohy z iteratoru dvojic (klic, volani), kde volani je (funkce, argumenty),
+    nebo None pro ulohu vyresenou bez poolu. Rozpracovanych je nejvys limit uloh. Vraci dvojice
+    (klic, future nebo None) v poradi dokonceni; pri predcasnem zavreni zbytek zrusi."""
+    from concurrent.futures import wait, FIRST_COMPLETED
+    pending = {}                            # future -> klic
+    try:
+        for key, call in tasks:
+            if call is None:
+                yield key, None
+                continue
+            func, args = call
+            pending[pool.submit(func, *args)] = key
+            if len(pending) >= limit:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future
+    finally:                                # generator zavreny predcasne, zbytek nepocitame
+        for future in pending:
+            future.cancel()
+
+
+def physical_offset(path):
+    """Fyzicky offset (v bytech na zarizeni) prvniho extentu file pres ioctl FIEMAP. Vrati None,
+    kdyz to filesystem neumi (tmpfs, NFS, ne-Linux), file je prazdny nebo nejde otevrit."""
+    import struct
+    try:
+        import fcntl
+    except ImportError:
+        return None
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        header = struct.calcsize(__FIEMAP_HEADER__)
+        buf = bytearray(struct.pack(__FIEMAP_HEADER__, 0, 0xFFFFFFFFFFFFFFFF, 0, 0, 1, 0) +
+                        bytes(__FIEMAP_EXTENT_SIZE__))     # misto pro jeden extent
+        fcntl.ioctl(fd, __FS_IOC_FIEMAP__, buf)
+        if not struct.unpack_from('=I', buf, 20)[0]:       # fm_mapped_extents
+            return None
+        return struct.unpack_from('=Q', buf, header + 8)[0]  # fe_physical
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def _hashable(entry):
+    """Jen obycejne files (i pres symlink); FIFO, socket nebo zarizeni by cteni zablokovaly.
+    Rozbity symlink projde, chybu nahlasi az hashovani."""
+    try:
+        return stat.S_ISREG(entry.stat().st_mode)
+    except OSError:
+        return True
+
+
+def _layout_key(path, info, order):
+    """Klic pro razeni podle umisteni na disku. Files bez FIEMAP jdou za ty s nim, podle inode."""
+    if order == 'physical':
+        offset = physical_offset(path)
+        if offset is not None:
+            return info.st_dev, 0, offset
+    return info.st_dev, 1, info.st_ino
+
+
+def order_files(paths, order='physical'):
+    """Seradi files tak, aby se na rotacnim disku cetly s co nejmene seeky. inode je levny
+    odhad (na ext4/xfs inody zhruba sleduji alokaci), physical pta se filesystemu na skutecny
+    prvni blok (FIEMAP) a jinak pouzije inode. walk vrati seznam beze zmeny. Files, ktere
+    nejde stat-nout, jsou na konci.
+    :return list cest"""
+    if order not in ORDERS:
+        raise ValueError('neznamy order {}, ocekavam jeden z {}'.format(order, ORDERS))
+    paths = list(paths)
+    if order == 'walk':
+        return paths
+    keyed, broken = [], []
+    for path in paths:
+        try:
+            keyed.append((_layout_key(path, os.stat(path), order), path))
+        except OSError:
+            broken.append(path)
+    keyed.sort()
+    return [path for _, path in keyed] + broken
+
+
+def hash_tree(root, algorithms=('sha256sum',), workers=None, recursive=True, use_processes=False,
+              buffer_size=DEFAULT_BUFFER_SIZE, use_mmap=False, skip_errors=False, cache=None, progress=None,
+              order='walk', fadvise=False):
+    """Zahashuje paralelne vsechny obycejne files pod root (pres walk_entries, FIFO a dalsi
+    specialni files preskoci). Je to generator, dvojice (file, OrderedDict typ -> hexdigest)
+    vraci prubezne tak, jak jednotlive files dobehnou - poradi tedy neodpovida poradi ve
+    stromu. Rozpracovanych je najednou jen par files na worker.
+    Default je pool vlaken, hashlib pri update velkych bloku uvolnuje GIL. use_processes=True
+    pouzije pool procesu, ktery pomuze u spousty malych files, kde prevazuje rezie pythonu.
+    :param algorithms typ nebo seznam typu z ALL_TYPES
+    :param workers pocet workeru, default pocet CPU
+    :param skip_errors neprecitelny file vrati s None misto hashu, jinak vyjimka probubla ven
+    :param cache HashCache; dotazy a zapisy bezi v hlavnim vlakne, do poolu jdou jen chybejici hashe
+    :param progress HashProgress; u procesu se byty zapocitaji az po dokonceni file
+    :param order walk - poradi adresare, inode/physical - nejdriv projde cely strom a cte podle
+    umisteni na disku (viz order_files); na rotacnim disku ma smysl s workers=1
+    :param fadvise radit jadru sekvencni cteni a po zahashovani file vyhodit z page cache"""
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+    from .myTools import walk_entries
+    types = [algorithms] if isinstance(algorithms, str) else list(algorithms)
+    _new_hashers(types)                     # neplatny typ chceme hned, ne az z workeru
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+
+    def tasks():
+        paths = (entry.path for entry in walk_entries(root, recursive) if _hashable(entry))
+        for file_path in (paths if order == 'walk' else order_files(paths, order)):
+            info, found = None, od()
+            if cache is not None:
+                try:
+                    info, found = _cache_lookup(cache, file_path, types)
+                except OSError:
+                    if not skip_errors:
+                        raise
+                    yield (file_path, None, None), None
+                    continue
+            missing = [typ for typ in types if typ not in found]
+            call = (_hash_file, (file_path, missing, buffer_size, use_mmap, worker_progress, fadvise)) \
+                if missing else None
+            yield (file_path, info, found), call
+
+    worker_progress = None if use_processes else progress     # do jineho procesu progress nepredame
+    with executor(max_workers=workers) as pool:
+        for task, future in _run_bounded(pool, tasks(), 4 * workers):
+            path, digests = _tree_result(future, task, types, skip_errors, cache)
+            if progress is not None:
+                size = 0
+                if use_processes and future is not None and digests is not None:
+                    size = os.path.getsize(path)
+                progress.file_done(size, failed=digests is None)
+            yield path, digests
+
+
+def _tree_result(future, task, types, skip_errors, cache):
+    """Vybali vysledek z future a doplni ho o hashe z cache. Pri chybe cteni vrati (file, None)
+    nebo vyjimku posle dal."""
+    file_path, info, found = task
+    if found is None:                       # nepovedl se uz stat
+        return file_path, None
+    if future is not None:
+        try:
+            _, computed = future.result()
+        except OSError:
+            if not skip_errors:
+                raise
+            return file_path, None
+        if cache is not None:
+            _cache_store(cache, file_path, info, computed)
+        found.update(computed)
+    return file_path, od((typ, found[typ]) for typ in types)
+
+
+def _type_from_name(manifest):
+    """Odhadne typ hashe z nazvu manifestu (B2SUMS, files.sha3-256, ...) pro typy, ktere maji
+    stejnou delku jako nektery SHA-2. Vrati typ, nebo None."""
+    name = os.path.basename(manifest).lower().replace('-', '_')
+    if 'b2sum' in name or 'blake2b' in name:
+        return 'blake2bsum'
+    for typ in EXTRA_TYPES:
+        if typ[:-3] in name:
+            return typ
+    return None
+
+
+def parse_manifest(manifest, typex=None, strict=False, stats=None):
+    """Generator trojic (typ, hexdigest, file) z manifestu ve formatu *sum - "hash  file",
+    "hash *file" nebo BSD "SHA256 (file) = hash". Typ se bere z typex, jinak z nazvu manifestu
+    (blake2/sha3 maji stejne delky jako sha2), jinak z delky hashe.
+    Radek zacinajici zpetnym lomitkem ma escapovane jmeno file (jako GNU coreutils).
+    Komentare a prazdne radky se preskoci, vadne radky taky - se strict hodi ValueError.
+    :param stats slovnik, do ktereho se doplni pocet vadnych radku 'malformed'
+    :raise ValueError pro neznamy typex (jinak by se zahodily vsechny radky)"""
+    if typex is not None and typex not in __HASH_MAP__:
+        raise ValueError('neznamy typ hashe {}, zname typy: {}'.format(typex, ', '.join(ALL_TYPES)))
+    if stats is not None:
+        stats['malformed'] = 0
+    hint = _type_from_name(manifest)
+    hint_length = new_hash(hint).digest_size * 2 if hint else None
+    with open(manifest, encoding='utf-8', errors='surrogateescape') as fh:
+        for number, line in enumerate(fh, 1):
+            line = line.rstrip('\r\n')
+            if not line or line.startswith('#'):
+                continue
+            escaped = line.startswith('\\')
+            if escaped:
+                line = line[1:]
+            match = __BSD_LINE__.match(line)
+            if match:
+                tag, path, digest = match.groups()
+                typ = typex or __BSD_TAGS__.get(tag.upper())
+            else:
+                match = __GNU_LINE__.match(line)
+                if match:
+                    digest, path = match.groups()
+                    typ = typex or (hint if len(digest) == hint_length else __DIGEST_LENGTHS__.get(len(digest)))
+            if not match or typ not in __HASH_MAP__:
+                if strict:
+                    raise ValueError('{}:{}: vadny radek manifestu'.format(manifest, number))
+                if stats is not None:
+                    stats['malformed'] += 1
+                continue
+            if escaped:
+                path = path.replace('\\\\', '\0').replace('\\n', '\n').replace('\0', '\\')
+            yield typ, digest.lower(), path
+
+
+def _check_result(future, task, cache):
+    """Vyhodnoti jeden file z check_manifest. Vrati status a pocet prectenych bytu."""
+    file_path, info, expected, found = task
+    if info is None:
+        return 'MISSING', 0
+    read = 0
+    if future is not None:
+        try:
+            _, computed = future.result()
+        except OSError:
+            return 'MISSING', 0
+        read = info.st_size
+        if cache is not None:
+            _cache_store(cache, file_path, info, computed)
+        found.update(computed)
+    ok = all(found[typ] == digest for typ, digest in expected)
+    return ('OK' if ok else 'FAILED'), read
+
+
+def check_manifest(manifest, typex=None, workers=None, fail_fast=False, base_dir=None,
+                   buffer_size=DEFAULT_BUFFER_SIZE, use_mmap=False, cache=None, stats=None, progress=None,
+                   order='size', fadvise=False):
+    """Overi files podle manifestu ve formatu *sum (viz parse_manifest) paralelne v poolu vlaken.
+    Generator dvojic (file, status), status je OK, FAILED, nebo MISSING (nejde otevrit/precist).
+    Pred hashovanim se vsechny files jen stat-nou: chybejici se hlasi hned, prazdne se porovnaji
+    bez cteni a zbytek jde do poolu od nejvetsich, aby se workery vytizily rovnomerne.
+    File uvedeny vic typy hashu se cte jen jednou.
+    :param fail_fast po prvnim FAILED/MISSING skoncit
+    :param base_dir k cemu vztahovat relativni cesty, default aktualni adresar
+    :param stats slovnik, do ktereho se doplni files, ok, failed, missing, malformed (preskocene
+    vadne radky manifestu), bytes, read a seconds
+    :param progress HashProgress; dostane i celkovy pocet files a objem, takze umi ETA
+    :param order size - od nejvetsich, inode/physical - podle umisteni na disku (viz order_files),
+    walk - v poradi manifestu
+    :param fadvise radit jadru sekvencni cteni a po overeni file vyhodit z page cache
+    :raise ValueError pro neznamy typex"""
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    wanted = od()                           # file -> [(typ, hash)]
+    parsed = {}
+    for typ, digest, path in parse_manifest(manifest, typex, stats=parsed):
+        if base_dir is not None:
+            path = os.path.join(base_dir, path)
+        wanted.setdefault(path, []).append((typ, digest))
+    counts = {'files': 0, 'ok': 0, 'failed': 0, 'missing': 0, 'malformed': parsed['malformed'], 'bytes': 0,
+              'read': 0}
+    queue, missing = [], []
+    for path, expected in wanted.items():
+        try:
+            info = os.stat(path)
+        except OSError:
+            missing.append(((path, None, expected, None), None))
+            continue
+        queue.append((path, info, expected))
+    if order == 'size':
+        queue.sort(key=lambda task: task[1].st_size, reverse=True)
+    elif order != 'walk':
+        if order not in ORDERS:
+            raise ValueError('neznamy order {}'.format(order))
+        queue.sort(key=lambda task: _layout_key(task[0], task[1], order))
+    if progress is not None:
+        progress.total_files = len(wanted)
+        progress.total_bytes = sum(info.st_size for _, info, _ in queue)
+
+    def tasks():
+        for task in missing:
+            yield task
+        for path, info, expected in queue:
+            types = [typ for typ, _ in expected]
+            found = od()
+            if info.st_size == 0:           # prazdny file neni treba cist
+                found = od((typ, __HASH_MAP__[typ]().hexdigest()) for typ in types)
+            elif cache is not None:
+                found = od((typ, d) for typ, d in ((t, cache.get(info, t)) for t in types) if d is not None)
+            todo = [typ for typ in types if typ not in found]
+            call = (_hash_file, (path, todo, buffer_size, use_mmap, progress, fadvise)) if todo else None
+            yield (path, info, expected, found), call
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = _run_bounded(pool, tasks(), 4 * workers)
+            for task, future in results:
+                status, read = _check_result(future, task, cache)
+                counts['files'] += 1
+                counts[status.lower()] += 1
+                counts['read'] += read
+                if task[1] is not None:
+                    counts['bytes'] += task[1].st_size
+                if progress is not None:        # precteny obsah uz dostal pres add_bytes
+                    progress.file_done(task[1].st_size if task[1] is not None and not read else 0,
+                                       failed=status != 'OK')
+                yield task[0], status
+                if fail_fast and status != 'OK':
+                    results.close()
+                    break
+    finally:
+        counts['seconds'] = time.perf_counter() - start
+        if stats is not None:
+            stats.update(counts)
+
+
+def validate_file (file, signature, typex="sha256sum", cache=None):
     """Zvaliduje dany file oproti dodane signature daneho typu. Vrati True/False, dodany hash, vypocteny hash a jeho typ.
     Default type je sha256."""
-    hashx, typex  = create_hash(file, typex)  # spocita hash file
+    hashx, typex  = create_hash(file, typex, cache=cache)  # spocita hash file
     dig = hashx.hexdigest()
     if (dig == signature): return True, hashx, typex
     else:
         return False, hashx, typex
 
-def prepare_arguments():
-    '''Nacte arguemnty a bud vrati jeden,dva, nebo tri. Pokud jich je jine mnozstvi, hodi exception.
-    Ocekavane poradi je file, typ, hash k validci.'''
+
+def _write_bench_file(path, size, block):
+    """Zapise file dane velikosti opakovanim nahodneho bloku."""
+    with open(path, 'wb') as fh:
+        remaining = size
+        while remaining > 0:
+            fh.write(block[:remaining])
+            remaining -= len(block)
+
+
+def benchmark(sizes=None, directory=None, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Zmeri propustnost get_hashsums v MB/s pro male, stredni a velke files. Porovnava puvodni
+    cteni po 1 KiB, velky buffer, mmap a paralelni vypocet vsech typu (seriovy vs. parallel).
+    Files lezi v page cache, takze se meri CPU a rezie pythonu, ne disk.
+    :param sizes OrderedDict jmeno -> (velikost file, pocet files), default BENCH_SIZES
+    :param directory kam zapsat docasne files, default systemovy temp
+    :return OrderedDict jmeno -> OrderedDict rezim -> MB/s"""
+    import tempfile, shutil, time
+    sizes = BENCH_SIZES if sizes is None else sizes
+    modes = od([('1KiB', (1024, False, False)), ('buffer', (buffer_size, False, False)),
+                ('mmap', (buffer_size, True, False)), ('parallel', (buffer_size, False, True))])
+    block = os.urandom(1024 * 1024)
+    results = od()
+    tmpdir = tempfile.mkdtemp(prefix='hashbench', dir=directory)
+    try:
+        for label, (size, count) in sizes.items():
+            paths = [os.path.join(tmpdir, '{}{}'.format(label, i)) for i in range(count)]
+            for path in paths:
+                _write_bench_file(path, size, block)
+            results[label] = od()
+            for mode, (buf, use_mmap, parallel) in modes.items():
+                start = time.perf_counter()
+                for path in paths:
+                    get_hashsums(path, buf, use_mmap, parallel=parallel)
+                elapsed = time.perf_counter() - start
+                results[label][mode] = size * count / elapsed / 1e6 if elapsed > 0 else float('inf')
+            for path in paths:
+                os.remove(path)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+    return results
+
+
+def benchmark_algorithms(types=None, size=64 * 1024 * 1024, rounds=3):
+    """Zmeri propustnost jednotlivych typu hashe v MB/s na tomto stroji, z dat v pameti
+    (bez I/O). Z kazdeho typu se bere nejlepsi z rounds mereni.
+    :return OrderedDict typ -> MB/s serazeny od nejrychlejsiho"""
+    import time
+    types = ALL_TYPES if types is None else types
+    block = os.urandom(min(size, DEFAULT_BUFFER_SIZE))
+    count = max(1, size // len(block))
+    results = {}
+    for typ in types:
+        best = None
+        for _ in range(rounds):
+            h = new_hash(typ)
+            start = time.perf_counter()
+            for _ in range(count):
+                h.update(block)
+            h.digest()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[typ] = len(block) * count / best / 1e6 if best > 0 else float('inf')
+    return od(sorted(results.items(), key=lambda item: item[1], reverse=True))
+
+
+def _drop_cache(paths):
+    """Vyhodi files z page cache (POSIX_FADV_DONTNEED, funguje jen pro ciste stranky)."""
+    for path in paths:
+        with open(path, 'rb') as fh:
+            os.posix_fadvise(fh.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def benchmark_order(directory, orders=ORDERS, types=('sha256sum',), workers=1, fadvise=True, rounds=1):
+    """Zmeri propustnost hash_tree v MB/s nad existujicim adresarem pro ruzna poradi cteni.
+    Pred kazdym behem vyhodi files z page cache, takze se meri disk. Smysl to ma na rotacnim
+    disku, nebo na loopback filesystemu nad obrazem na nem, napr.:
+        truncate -s 4G /var/tmp/bench.img; mkfs.ext4 /var/tmp/bench.img
+        mount -o loop /var/tmp/bench.img /mnt/bench; (nakopirovat data); sync
+    Na SSD a tmpfs vyjdou vsechna poradi priblizne stejne.
+    :return OrderedDict poradi -> MB/s (nejlepsi z rounds behu)"""
+    from .myTools import walk_entries
+    paths = [entry.path for entry in walk_entries(directory) if _hashable(entry)]
+    total = sum(os.path.getsize(path) for path in paths)
+    results = od()
+    for order in orders:
+        best = None
+        for _ in range(rounds):
+            if hasattr(os, 'posix_fadvise'):
+                _drop_cache(paths)
+            start = time.perf_counter()
+            for _ in hash_tree(directory, types, workers, order=order, fadvise=fadvise):
+                pass
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[order] = total / best / 1e6 if best > 0 else float('inf')
+    return results
+
+
+def _machine_key():
+    """Identifikace stroje a knihoven, pro ktere plati ulozeny benchmark."""
+    import platform, ssl
+    return '|'.join([platform.node(), platform.machine(), platform.processor(), str(os.cpu_count()),
+                     platform.python_version(), ssl.OPENSSL_VERSION])
+
+
+def _bench_cache_file():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'daptools', 'hashbench.json')
+
+
+def select_fastest(types=None, cache_file=None, refresh=False):
+    """Vybere nejrychlejsi typ hashe na tomto stroji - jen pro kontrolu integrity (poskozeni
+    dat, ne utocnik), kde nezalezi na kryptograficke sile. Vysledek benchmark_algorithms se
+    ulozi do cache_file (default ~/.cache/daptools/hashbench.json) pro dany stroj a verzi
+    pythonu/OpenSSL, dalsi volani uz nemeri.
+    :param refresh zmerit znovu i kdyz je vysledek v cache
+    :return jmeno typu"""
+    import json
+    types = ALL_TYPES if types is None else list(types)
+    cache_file = _bench_cache_file() if cache_file is None else cache_file
+    key = _machine_key()
+    stored = {}
+    try:
+        with open(cache_file) as fh:
+            stored = json.load(fh)
+    except (OSError, ValueError):
+        stored = {}
+    rates = stored.get(key, {})
+    if refresh or any(typ not in rates for typ in types):
+        rates.update(benchmark_algorithms(types))
+        stored[key] = rates
+        try:
+            os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+            with open(cache_file, 'w') as fh:
+                json.dump(stored, fh, indent=1)
+        except OSError:
+            pass                    # cache je jen zrychleni, bez ni se da zit
+    return max(types, key=lambda typ: rates[typ])
+
+
+def prepare_arguments(argv=None):
+    '''Nacte argumenty. Pozicni parametry jsou jeden, dva, nebo tri. Pokud jich je jine mnozstvi
+    (a nejde o benchmark), hodi exception. Ocekavane poradi je file, typ, hash k validci.'''
     import argparse
     # vytvoreni parseru, nastaveni message a nastaveni formatovani textu
     parser = argparse.ArgumentParser(description='Pouziti pro generovani hashe k file a  k validaci hashe na file.',
                                      formatter_class=argparse.RawTextHelpFormatter,
                                      epilog='')
     parser.add_argument('parametry',                        # pridani argumentu
-                        help='argumenty: soubor, typ, hash.\nPouziti: \ngenerateSHA(file) \t\t- vygeneruje sha256 hash pro dany file\n'
+                        help='argumenty: soubor, typ, hash.\nPouziti: \ngenerateSHA(file) \t\t- vygeneruje sha256 hash pro dany file'
+                             ' (- je stdin)\n'
                              'generateSHA(file, typHashe)  \t- vygeneruje pro file hash dodaneho typu\n'
                              'generateSHA(file, typHashe, hash) - zkontroluje jestli file ma hash daneho typu '
                              'rovny zadanemu hashi.',
                         nargs='*')
-    argumenty = parser.parse_args()
-    lst = []
-    for element in argumenty.parametry:     # prepocet z namespace na list. Udelat elegantneji? Ted neni cas...
-        lst.append(element)
-    if len(lst) == 1:
-        return lst[0]
-    elif len(lst) == 2:
-        return lst[0], lst[1]
-    elif len(lst) == 3:
-        return lst[0], lst[1], lst[2]
-    else:
+    parser.add_argument('--buffer', type=int, default=DEFAULT_BUFFER_SIZE,
+                        help='velikost bufferu pro cteni v bytech (default {})'.format(DEFAULT_BUFFER_SIZE))
+    parser.add_argument('--mmap', action='store_true', help='velke files cist pres mmap')
+    parser.add_argument('--all', action='store_true', help='vypise vsechny typy hashe (get_hashsums)')
+    parser.add_argument('--parallel', action='store_true', help='u --all pocitat typy soubezne ve vlaknech')
+    parser.add_argument('--tree', metavar='DIR', help='zahashuje vsechny files v adresari DIR a podadresarich')
+    parser.add_argument('--types', default=None,
+                        help='typy hashe oddelene carkou pro --tree (default sha256sum);\n'
+                             'u --check vnuti typ misto odhadu podle delky hashe')
+    parser.add_argument('--check', metavar='MANIFEST', help='overi files podle manifestu ve formatu *sum')
+    parser.add_argument('--quiet', action='store_true', help='u --check vypisovat jen chyby')
+    parser.add_argument('--fail-fast', action='store_true', help='u --check skoncit po prvni chybe')
+    parser.add_argument('--workers', type=int, default=None, help='pocet paralelnich workeru (default pocet CPU)')
+    parser.add_argument('--processes', action='store_true', help='misto vlaken pouzit procesy')
+    parser.add_argument('--order', choices=ORDERS, default=None,
+                        help='poradi cteni u --tree/--check: walk, inode, nebo physical (FIEMAP);\n'
+                             'na rotacnim disku s --workers 1 setri seeky')
+    parser.add_argument('--fadvise', action='store_true', help='sekvencni readahead a po precteni vyhodit '
+                                                               'file z page cache')
+    parser.add_argument('--bench-order', metavar='DIR', help='porovna propustnost poradi cteni nad adresarem DIR')
+    parser.add_argument('--cache', metavar='DB', help='SQLite cache hashu; nezmenene files se necetou')
+    parser.add_argument('--progress', action='store_true', help='prubezne vypisovat MB/s a ETA na stderr')
+    parser.add_argument('--stats-json', metavar='FILE', help='na konci zapsat statistiku behu jako JSON')
+    parser.add_argument('--bench-algos', action='store_true', help='zmeri propustnost vsech typu hashe')
+    parser.add_argument('--fastest', action='store_true', help='vypise nejrychlejsi typ na tomto stroji '
+                                                               '(ulozeny benchmark); --types auto ho pouzije')
+    parser.add_argument('--bench', action='store_true', help='zmeri propustnost hashovani na malych, '
+                                                             'strednich a velkych files')
+    argumenty = parser.parse_args(argv)
+    if not (argumenty.bench or argumenty.bench_algos or argumenty.bench_order or argumenty.fastest or
+            argumenty.tree or argumenty.check) and not 1 <= len(argumenty.parametry) <= 3:
         raise ValueError("parametru musi byt bud 1, 2 nebo 3, dostal jsem {}"
-                         .format(len(lst)))
+                         .format(len(argumenty.parametry)))
+    return argumenty
 
 if __name__ == "__main__":
-    args = prepare_arguments()
-    if len(args) == 1:              # chci vygenerovat sha256sum hash pro zadany file
-        aaa, typ = create_hash(args[0])
-        print('file {}; type of hash {}\nhash {}'.format(args[0], 'sha256sum', aaa))
-    elif len(args) == 2:            # chci vygenerovat jinou hash nez standardni pro file
-        aaa, typ = create_hash(args[0], args[1])
-        print('file {}; type of hash {}\nhash {}'.format(args[0], typ, aaa))
+    argumenty = prepare_arguments()
+    args = argumenty.parametry
+    exit_code = 0
+    cache = None
+    if argumenty.cache:
+        from .hashCache import HashCache
+        cache = HashCache(argumenty.cache)
+    progress = None
+    if argumenty.progress or argumenty.stats_json:
+        report = (lambda p: print('\r' + str(p), end='', file=sys.stderr)) if argumenty.progress else None
+        progress = HashProgress(report)
+    if argumenty.bench:             # mereni propustnosti
+        for label, modes in benchmark(buffer_size=argumenty.buffer).items():
+            print('{:8s} '.format(label) + '  '.join('{} {:.1f} MB/s'.format(m, v) for m, v in modes.items()))
+    elif argumenty.bench_algos:     # propustnost jednotlivych typu
+        for typ, rate in benchmark_algorithms().items():
+            print('{:12s} {:8.1f} MB/s'.format(typ, rate))
+    elif argumenty.bench_order:     # poradi cteni na disku
+        for order, rate in benchmark_order(argumenty.bench_order, workers=argumenty.workers or 1).items():
+            print('{:10s} {:8.1f} MB/s'.format(order, rate))
+    elif argumenty.fastest:
+        print(select_fastest())
+    elif argumenty.tree:            # hash celeho stromu, vystup ve formatu sha256sum
+        types = (argumenty.types or 'sha256sum').split(',')
+        if types == ['auto']:
+            types = [select_fastest()]
+        for path, digests in hash_tree(argumenty.tree, types, argumenty.workers,
+                                       use_processes=argumenty.processes, buffer_size=argumenty.buffer,
+                                       use_mmap=argumenty.mmap, skip_errors=True, cache=cache,
+                                       progress=progress, order=argumenty.order or 'walk',
+                                       fadvise=argumenty.fadvise):
+            if digests is None:
+                print('{}: nelze precist'.format(path), file=sys.stderr)
+                continue
+            for typ, digest in digests.items():
+                prefix = '' if len(types) == 1 else typ + ' '
+                print('{}{}  {}'.format(prefix, digest, path))
+    elif argumenty.check:           # hromadna kontrola podle manifestu
+        stats = {}
+        typ = None if argumenty.types in (None, 'auto') else argumenty.types    # auto = podle manifestu
+        try:
+            for path, status in check_manifest(argumenty.check, typ, argumenty.workers,
+                                               argumenty.fail_fast, buffer_size=argumenty.buffer,
+                                               use_mmap=argumenty.mmap, cache=cache, stats=stats,
+                                               progress=progress, order=argumenty.order or 'size',
+                                               fadvise=argumenty.fadvise):
+                if status == 'MISSING':
+                    print('{}: FAILED open or read'.format(path))
+                elif status == 'FAILED' or not argumenty.quiet:
+                    print('{}: {}'.format(path, status))
+        except ValueError as chyba:
+            print('{}: {}'.format(argumenty.check, chyba), file=sys.stderr)
+            sys.exit(2)
+        if stats['malformed']:
+            print('VAROVANI: {} radku manifestu ma chybny format'.format(stats['malformed']), file=sys.stderr)
+        rate = stats['bytes'] / stats['seconds'] / 1e6 if stats['seconds'] > 0 else 0.0
+        print('{files} files, {failed} nesouhlasi, {missing} chybi; {0:.1f} MB za {seconds:.2f} s'
+              .format(stats['bytes'] / 1e6, **stats) + ' ({:.1f} MB/s)'.format(rate), file=sys.stderr)
+        if not stats['files']:
+            print('{}: zadne radky ve spravnem formatu'.format(argumenty.check), file=sys.stderr)
+            exit_code = 1
+        if stats['failed'] or stats['missing']:
+            exit_code = 1
+    elif argumenty.all:             # vsechny typy hashe najednou
+        for path in args:
+            for typ, digest in get_hashsums(path, argumenty.buffer, argumenty.mmap, cache,
+                                            argumenty.parallel, progress=progress).items():
+                print('{} {}  {}'.format(typ, digest, path))
+    elif len(args) in (1, 2):       # chci vygenerovat hash (default sha256sum) pro file, '-' je stdin
+        typ = args[1] if len(args) == 2 else 'sha256sum'
+        if args[0] == '-':
+            digest = hash_stream(sys.stdin.buffer, typ, buffer_size=argumenty.buffer)[typ]
+        else:
+            aaa, typ = create_hash(args[0], typ, buffer_size=argumenty.buffer, use_mmap=argumenty.mmap,
+                                   cache=cache, progress=progress)
+            digest = aaa.hexdigest()
+        print('file {}; type of hash {}\nhash {}'.format(args[0], typ, digest))
     elif len(args) == 3:            # chci zvalidovat file podle dodaneho hashe
-        vysl, hsh, typ = validate_file(args[0], args[2], args[1])
+        vysl, hsh, typ = validate_file(args[0], args[2], args[1], cache)
         print('dodavy hash je {}'.format(args[2]))
         print('file {} ma hash = {} typu {}'.format(args[0], hsh.hexdigest(), typ))
         if vysl:
             print('File validated.')
         else:
             print('!!!! Vysledek nesouhlasi !!!!')
-
+    if progress is not None:
+        progress.finish()
+        if argumenty.progress:
+            print(file=sys.stderr)
+        if argumenty.stats_json:
+            progress.dump(argumenty.stats_json)
+    if cache is not None:
+        print('cache: {hits} zasahu, {misses} minuti, {entries} zaznamu'.format(**cache.stats()), file=sys.stderr)
+        cache.close()
+    sys.exit(exit_code)
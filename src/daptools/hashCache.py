@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+hashCache - perzistentni cache hashu v SQLite. Klicem je (device, inode, size, mtime_ns, typ),
+takze nezmeneny file stoji pri dalsim behu jen jeden stat() misto precteni vsech dat.
+Pocet zaznamu je omezeny, pri prekroceni se vyhazuji nejdele nepouzite (LRU).
+Created on 18/10/2026, 09:12
+
+@author: David Potucek
+"""
+
+import os, sqlite3, threading
+
+DEFAULT_MAX_ENTRIES = 1000000
+__COMMIT_EVERY__ = 1000         # po kolika zmenach zapsat transakci
+
+
+class CachedDigest:
+    """Nahrada hash objektu pro hash nalezeny v cache - umi jen vratit vysledek."""
+
+    __slots__ = ('name', '_hexdigest')
+
+    def __init__(self, name, hexdigest):
+        self.name = name
+        self._hexdigest = hexdigest
+
+    def hexdigest(self):
+        return self._hexdigest
+
+    def digest(self):
+        return bytes.fromhex(self._hexdigest)
+
+
+class HashCache:
+    """Cache hashu ulozena v SQLite databazi db_path. Lze sdilet mezi vlakny.
+    Pocitadla hits a misses udavaji uspesnost dotazu get()."""
+
+    def __init__(self, db_path, max_entries=DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError('max_entries musi byt kladny')
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS hashes (dev INTEGER, ino INTEGER, size INTEGER, '
+                           'mtime_ns INTEGER, algorithm TEXT, digest TEXT, used INTEGER, '
+                           'PRIMARY KEY (dev, ino, algorithm))')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS hashes_used ON hashes (used)')
+        self._count, last = self._conn.execute('SELECT COUNT(*), MAX(used) FROM hashes').fetchone()
+        self._tick = last or 0      # citac pouziti pro LRU
+
+    def get(self, info, algorithm):
+        """Vrati hexdigest pro file s danym os.stat vysledkem, nebo None pokud neni v cache
+        nebo se file od ulozeni zmenil."""
+        with self._lock:
+            row = self._conn.execute('SELECT size, mtime_ns, digest FROM hashes WHERE dev=? AND ino=? '
+                                     'AND algorithm=?', (info.st_dev, info.st_ino, algorithm)).fetchone()
+            if row is None or row[0] != info.st_size or row[1] != info.st_mtime_ns:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._tick += 1
+            self._conn.execute('UPDATE hashes SET used=? WHERE dev=? AND ino=? AND algorithm=?',
+                               (self._tick, info.st_dev, info.st_ino, algorithm))
+            self._changed()
+            return row[2]
+
+    def put(self, info, algorithm, digest):
+        """Ulozi hexdigest pro file s danym os.stat vysledkem. Starsi zaznam prepise."""
+        key = (info.st_dev, info.st_ino, algorithm)
+        with self._lock:
+            self._tick += 1
+            known = self._conn.execute('SELECT 1 FROM hashes WHERE dev=? AND ino=? AND algorithm=?',
+                                       key).fetchone()
+            self._conn.execute('INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?)',
+                               (info.st_dev, info.st_ino, info.st_size, info.st_mtime_ns,
+                                algorithm, digest, self._tick))
+            if known is None:
+                self._count += 1
+                if self._count > self.max_entries:
+                    self._evict()
+            self._changed()
+
+    def _evict(self):
+        """Vyhodi nejdele nepouzite zaznamy, s rezervou 10 %, aby se nemazalo po jednom."""
+        excess = self._count - self.max_entries + max(1, self.max_entries // 10)
+        self._conn.execute('DELETE FROM hashes WHERE rowid IN '
+                           '(SELECT rowid FROM hashes ORDER BY used LIMIT ?)', (excess,))
+        self._count = self._conn.execute('SELECT COUNT(*) FROM hashes').fetchone()[0]
+
+    def invalidate(self, path):
+        """Smaze z cache vsechny hashe daneho file. Vrati pocet smazanych zaznamu."""
+        info = os.stat(path)
+        with self._lock:
+            cur = self._conn.execute('DELETE FROM hashes WHERE dev=? AND ino=?', (info.st_dev, info.st_ino))
+            self._count -= cur.rowcount
+            self._changed()
+            return cur.rowcount
+
+    def clear(self):
+        """Vyprazdni celou cache a vynuluje pocitadla."""
+        with self._lock:
+            self._conn.execute('DELETE FROM hashes')
+            self._conn.commit()
+            self._count = 0
+            self._dirty = 0
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return self._count
+
+    def stats(self):
+        """Vrati slovnik s pocty zasahu, minuti a zaznamu."""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': self._count}
+
+    def _changed(self):
+        self._dirty += 1
+        if self._dirty >= __COMMIT_EVERY__:
+            self._conn.commit()
+            self._dirty = 0
+
+    def flush(self):
+        """Zapise rozpracovanou transakci na disk."""
+        with self._lock:
+            self._conn.commit()
+            self._dirty = 0
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    import sys
+    with HashCache(sys.argv[1]) as cache:
+        print('{} zaznamu v {}'.format(len(cache), cache.db_path))
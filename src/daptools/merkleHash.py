@@ -0,0 +1,262 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+merkleHash - blokovy Merkle hash velkych files (obrazy VM apod.). Hashe jednotlivych bloku
+se ukladaji do sidecar file vedle dat (file.merkle). Po zmene nekolika mist se prepocitaji jen
+dotcene bloky a root hash zustava stabilni, takze se porovnava stejne jako plochy hash
+z generateSHA. List = H(0x00 + blok), uzel = H(0x01 + levy + pravy), lichy uzel postupuje o
+uroven vys beze zmeny.
+Created on 18/10/2026, 10:05
+
+@author: David Potucek
+"""
+
+import os, json
+
+from .generateSHA import new_hash
+
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+SIDECAR_SUFFIX = '.merkle'
+__MAGIC__ = 'daptools-merkle-1'
+
+
+class MerkleTree:
+    """Merkle strom nad bloky jednoho file. leaves je list digestu (bytes) bloku, vzdy aspon
+    jeden - prazdny file ma jeden prazdny blok."""
+
+    def __init__(self, typex, block_size, size, leaves, mtime_ns=None):
+        self.typex = typex
+        self.block_size = block_size
+        self.size = size
+        self.leaves = list(leaves)
+        self.mtime_ns = mtime_ns
+        self._levels = None
+
+    def _node(self, left, right):
+        h = new_hash(self.typex)
+        h.update(b'\x01')
+        h.update(left)
+        h.update(right)
+        return h.digest()
+
+    def levels(self):
+        """Vrati vsechny urovne stromu od listu ke koreni. Pocita se jednou, pak je v pameti."""
+        if self._levels is None:
+            level = self.leaves
+            levels = [level]
+            while len(level) > 1:
+                upper = [self._node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+                if len(level) % 2:
+                    upper.append(level[-1])
+                levels.append(upper)
+                level = upper
+            self._levels = levels
+        return self._levels
+
+    @property
+    def root(self):
+        """Root hash jako hex string."""
+        return self.levels()[-1][0].hex()
+
+    def __len__(self):
+        return len(self.leaves)
+
+
+def block_count(size, block_size):
+    """Pocet bloku file dane velikosti; prazdny file ma jeden blok."""
+    return max(1, -(-size // block_size))
+
+
+def _hash_blocks(path, typex, block_size, indices):
+    """Generator dvojic (index, digest listu) pro dane bloky. Bloky se ctou vzestupne
+    pres jeden znovupouzivany buffer."""
+    buf = bytearray(block_size)
+    with open(path, 'rb', buffering=0) as fd, memoryview(buf) as view:
+        position = None
+        for index in sorted(indices):
+            offset = index * block_size
+            if offset != position:
+                fd.seek(offset)
+            n = 0
+            while n < block_size:           # readinto muze vratit mene nez plny blok
+                got = fd.readinto(view[n:])
+                if not got:
+                    break
+                n += got
+            position = offset + n
+            h = new_hash(typex)
+            h.update(b'\x00')
+            h.update(view[:n])
+            yield index, h.digest()
+
+
+def build_tree(path, block_size=DEFAULT_BLOCK_SIZE, typex='sha256sum'):
+    """Spocita Merkle strom celeho file."""
+    info = os.stat(path)
+    count = block_count(info.st_size, block_size)
+    leaves = [digest for _, digest in _hash_blocks(path, typex, block_size, range(count))]
+    return MerkleTree(typex, block_size, info.st_size, leaves, info.st_mtime_ns)
+
+
+def update_tree(path, tree, changed=None):
+    """Aktualizuje strom po zmene file. Prepocita jen bloky, ktere zasahuji do zmenenych rozsahu,
+    a pri zmene delky file i bloky od puvodniho konce dal.
+    :param tree puvodni MerkleTree (napr. ze sidecar)
+    :param changed seznam dvojic (offset, delka) zmenenych bytu; None = prepocitat vse
+    :return novy MerkleTree a seznam prepocitanych bloku"""
+    info = os.stat(path)
+    size = tree.block_size
+    count = block_count(info.st_size, size)
+    if changed is None:
+        dirty = set(range(count))
+    else:
+        dirty = set()
+        for offset, length in changed:
+            if length > 0 and offset < info.st_size:
+                dirty.update(range(offset // size, min((offset + length - 1) // size, count - 1) + 1))
+    if info.st_size != tree.size or len(tree.leaves) != count:
+        dirty.update(range(min(info.st_size, tree.size) // size, count))
+    leaves = tree.leaves[:count] + [None] * (count - len(tree.leaves))
+    for index, digest in _hash_blocks(path, tree.typex, size, dirty):
+        leaves[index] = digest
+    return MerkleTree(tree.typex, size, info.st_size, leaves, info.st_mtime_ns), sorted(dirty)
+
+
+def diff_trees(first, second):
+    """Vrati seznam indexu bloku, ve kterych se stromy lisi. Jde od korene dolu a sestupuje
+    jen do podstromu s rozdilnym hashem, takze pro par zmen porovna jen O(log n) uzlu."""
+    if (first.typex, first.block_size) != (second.typex, second.block_size):
+        raise ValueError('stromy maji jiny typ hashe nebo velikost bloku')
+    if len(first) != len(second):           # jiny tvar stromu, porovname listy
+        common = min(len(first), len(second))
+        return [i for i in range(common) if first.leaves[i] != second.leaves[i]] + \
+            list(range(common, max(len(first), len(second))))
+    levels_a, levels_b = first.levels(), second.levels()
+    result = []
+    stack = [(len(levels_a) - 1, 0)]
+    while stack:
+        level, index = stack.pop()
+        if levels_a[level][index] == levels_b[level][index]:
+            continue
+        if level == 0:
+            result.append(index)
+            continue
+        for child in (2 * index + 1, 2 * index):    # mensi index navrch zasobniku
+            if child < len(levels_a[level - 1]):
+                stack.append((level - 1, child))
+    return result
+
+
+def verify_file(path, tree, blocks=None):
+    """Prepocita dane bloky file (default vsechny) a vrati seznam tech, ktere nesouhlasi
+    se stromem. Bloky za koncem kratsiho z nich se hlasi jako rozdilne."""
+    count = block_count(os.stat(path).st_size, tree.block_size)
+    blocks = range(max(count, len(tree))) if blocks is None else blocks
+    readable = [i for i in blocks if i < count]
+    bad = [i for i in blocks if i >= count or i >= len(tree)]
+    for index, digest in _hash_blocks(path, tree.typex, tree.block_size, readable):
+        if index < len(tree) and digest != tree.leaves[index]:
+            bad.append(index)
+    return sorted(set(bad))
+
+
+def sidecar_path(path):
+    return path + SIDECAR_SUFFIX
+
+
+def save_sidecar(tree, sidecar):
+    """Ulozi strom: jeden radek JSON hlavicky a za nim surove digesty listu."""
+    header = {'format': __MAGIC__, 'type': tree.typex, 'block_size': tree.block_size,
+              'size': tree.size, 'mtime_ns': tree.mtime_ns, 'blocks': len(tree), 'root': tree.root}
+    tmp = sidecar + '.tmp'
+    with open(tmp, 'wb') as fh:
+        fh.write(json.dumps(header).encode('ascii') + b'\n')
+        fh.write(b''.join(tree.leaves))
+    os.replace(tmp, sidecar)                # stary sidecar zustane cely, dokud neni novy hotovy
+
+
+def load_sidecar(sidecar):
+    """Nacte strom ze sidecar file. Poskozeny file hodi ValueError."""
+    with open(sidecar, 'rb') as fh:
+        header = json.loads(fh.readline())
+        data = fh.read()
+    if header.get('format') != __MAGIC__:
+        raise ValueError('{} neni Merkle sidecar'.format(sidecar))
+    width = new_hash(header['type']).digest_size
+    if len(data) != width * header['blocks']:
+        raise ValueError('{}: nesouhlasi pocet bloku'.format(sidecar))
+    leaves = [data[i:i + width] for i in range(0, len(data), width)]
+    tree = MerkleTree(header['type'], header['block_size'], header['size'], leaves, header['mtime_ns'])
+    if tree.root != header['root']:
+        raise ValueError('{}: nesouhlasi root hash'.format(sidecar))
+    return tree
+
+
+def is_fresh(path, tree):
+    """True pokud velikost a mtime file odpovidaji stromu."""
+    info = os.stat(path)
+    return info.st_size == tree.size and info.st_mtime_ns == tree.mtime_ns
+
+
+def reverify(path, reference, sidecar=None):
+    """Porovna file s referencnim stromem (napr. sidecar ze zdrojove kopie). Je-li lokalni sidecar
+    aktualni, rozdilne bloky najde jen porovnanim stromu a precte pouze ty; jinak strom
+    spocita znovu a sidecar prepise.
+    :return seznam bloku, ktere se od reference lisi"""
+    sidecar = sidecar_path(path) if sidecar is None else sidecar
+    local = None
+    if os.path.exists(sidecar):
+        try:
+            local = load_sidecar(sidecar)
+        except (ValueError, KeyError):
+            local = None
+    if local is None or not is_fresh(path, local) or \
+            (local.typex, local.block_size) != (reference.typex, reference.block_size):
+        local = build_tree(path, reference.block_size, reference.typex)
+        save_sidecar(local, sidecar)
+        return diff_trees(local, reference)
+    return verify_file(path, reference, diff_trees(local, reference))
+
+
+def prepare_arguments(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Blokovy Merkle hash velkych files se sidecar file.',
+                                     formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('akce', choices=('build', 'update', 'verify', 'diff'),
+                        help='build - spocita strom a ulozi sidecar\n'
+                             'update - prepocita zmenene bloky (--range), jinak vse\n'
+                             'verify - porovna file s referencnim sidecar (--against)\n'
+                             'diff - vypise rozdilne bloky dvou sidecar files')
+    parser.add_argument('soubory', nargs='+')
+    parser.add_argument('--block-size', type=int, default=DEFAULT_BLOCK_SIZE)
+    parser.add_argument('--type', default='sha256sum')
+    parser.add_argument('--range', action='append', default=None, metavar='OFFSET:DELKA',
+                        help='zmeneny rozsah bytu, lze opakovat')
+    parser.add_argument('--against', metavar='SIDECAR', help='referencni sidecar pro verify')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    argumenty = prepare_arguments()
+    if argumenty.akce == 'diff':
+        print(diff_trees(load_sidecar(argumenty.soubory[0]), load_sidecar(argumenty.soubory[1])))
+        raise SystemExit
+    for soubor in argumenty.soubory:
+        if argumenty.akce == 'build':
+            strom = build_tree(soubor, argumenty.block_size, argumenty.type)
+            save_sidecar(strom, sidecar_path(soubor))
+            print('{}  {}'.format(strom.root, soubor))
+        elif argumenty.akce == 'update':
+            zmeny = None
+            if argumenty.range:
+                zmeny = [tuple(int(x) for x in r.split(':')) for r in argumenty.range]
+            strom, prepocteno = update_tree(soubor, load_sidecar(sidecar_path(soubor)), zmeny)
+            save_sidecar(strom, sidecar_path(soubor))
+            print('{}  {} ({} bloku prepocteno)'.format(strom.root, soubor, len(prepocteno)))
+        elif argumenty.akce == 'verify':
+            reference = load_sidecar(argumenty.against or sidecar_path(soubor))
+            if argumenty.against:
+                spatne = reverify(soubor, reference)
+            else:
+                spatne = verify_file(soubor, reference)
+            print('{}: {}'.format(soubor, 'OK' if not spatne else 'FAILED bloky {}'.format(spatne)))
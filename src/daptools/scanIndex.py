@@ -0,0 +1,198 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+scanIndex - perzistentni index adresarovych stromu v SQLite. Pro kazdy adresar si pamatuje
+jeho mtime a seznam polozek (jmeno, typ, velikost, mtime). Dalsi scan udela na adresar jeden
+stat() a adresar, jehoz mtime se nezmenila, necte - polozky vezme z indexu. Vraci rozdil proti
+minulemu scanu: pridane, smazane a zmenene files.
+Pozor: mtime adresare se meni jen pri pridani, smazani nebo prejmenovani polozky, ne pri
+prepsani obsahu file. Zmeny files v nezmenenych adresarich se proto bez check_files neprojevi.
+Created on 18/10/2026, 15:10
+
+@author: David Potucek
+"""
+
+import os, sqlite3, stat, time
+
+__RACY_NS__ = 2 * 10 ** 9       # adresari zmenenemu tesne pred scanem se mtime neveri
+
+
+class ScanIndex:
+    """Index stromu ulozeny v SQLite databazi db_path. Cesty se ukladaji absolutni, jeden index
+    muze drzet vic stromu."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER)')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS entries (dir TEXT, name TEXT, is_dir INTEGER, '
+                           'size INTEGER, mtime_ns INTEGER, PRIMARY KEY (dir, name))')
+
+    def _entries(self, directory):
+        """Polozky adresare z indexu: jmeno -> (is_dir, size, mtime_ns)."""
+        rows = self._conn.execute('SELECT name, is_dir, size, mtime_ns FROM entries WHERE dir=?', (directory,))
+        return {name: (is_dir, size, mtime) for name, is_dir, size, mtime in rows}
+
+    def _forget(self, directory):
+        """Vymaze adresar i s podstromem z indexu. Vrati seznam files, ktere v nem byly."""
+        subtree = ('SELECT path FROM dirs WHERE path=? OR (path>=? AND path<?)',
+                   (directory, directory + '/', directory + '0'))   # '0' je znak za '/'
+        removed = []
+        for (path,) in self._conn.execute(*subtree).fetchall():
+            removed.extend(os.path.join(path, name) for (name,) in
+                           self._conn.execute('SELECT name FROM entries WHERE dir=? AND is_dir=0', (path,)))
+            self._conn.execute('DELETE FROM entries WHERE dir=?', (path,))
+            self._conn.execute('DELETE FROM dirs WHERE path=?', (path,))
+        return sorted(removed)
+
+    def scan(self, root, check_files=False, stats=None, onerror=None):
+        """Projde strom pod root a aktualizuje index. Generator dvojic ('added'|'removed'|'modified',
+        cesta k file); prvni scan stromu hlasi vsechny files jako added. Adresare se
+        zpracovavaji shora dolu, kazdy se do indexu zapise hned, takze i predcasne ukonceny scan
+        necha index konzistentni.
+        :param check_files u nezmenenych adresaru stat-nout i files, aby se nasly zmeny obsahu
+        Adresar, ktery nejde precist, zustane v indexu beze zmeny (i s podstromem) a pristi scan
+        ho zkusi znovu.
+        :param stats slovnik, do ktereho se doplni dirs, listed (prectene adresare), skipped, stats
+        a errors (neprectene adresare)
+        :param onerror zavola se s OSError adresare, ktery nejde precist"""
+        root = os.path.abspath(root)
+        now = time.time_ns()
+        counts = {'dirs': 0, 'listed': 0, 'skipped': 0, 'stats': 0, 'errors': 0}
+        stack = [root]
+        try:
+            while stack:
+                directory = stack.pop()
+                counts['dirs'] += 1
+                counts['stats'] += 1
+                try:
+                    info = os.stat(directory)
+                except OSError:
+                    info = None
+                if info is None or not stat.S_ISDIR(info.st_mode):     # adresar zmizel
+                    for path in self._forget(directory):
+                        yield 'removed', path
+                    continue
+                row = self._conn.execute('SELECT mtime_ns FROM dirs WHERE path=?', (directory,)).fetchone()
+                old = self._entries(directory)
+                if row is not None and row[0] == info.st_mtime_ns:
+                    counts['skipped'] += 1
+                    if check_files:
+                        for change in self._check_files(directory, old, counts):
+                            yield change
+                    subdirs = [name for name, entry in old.items() if entry[0]]
+                else:
+                    subdirs = []
+                    try:
+                        changes = self._update(directory, old, subdirs)
+                    except OSError as error:    # stare polozky nechat, mtime NULL = priste znovu
+                        counts['errors'] += 1
+                        self._conn.execute('INSERT OR REPLACE INTO dirs VALUES (?, NULL)', (directory,))
+                        if onerror is not None:
+                            onerror(error)
+                        continue
+                    counts['listed'] += 1
+                    for change in changes:
+                        yield change
+                    mtime = info.st_mtime_ns if info.st_mtime_ns < now - __RACY_NS__ else None
+                    self._conn.execute('INSERT OR REPLACE INTO dirs VALUES (?, ?)', (directory, mtime))
+                stack.extend(os.path.join(directory, name) for name in sorted(subdirs, reverse=True))
+        finally:
+            self._conn.commit()
+            if stats is not None:
+                stats.update(counts)
+
+    def _update(self, directory, old, subdirs):
+        """Precte adresar, porovna ho s indexem a index prepise. Jmena podadresaru prida do subdirs.
+        Kdyz adresar nejde precist, probubla OSError a index zustane beze zmeny."""
+        new = {}
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        new[entry.name] = (1, 0, 0)
+                        continue
+                    info = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                new[entry.name] = (0, info.st_size, info.st_mtime_ns)
+        changes = []
+        for name, (was_dir, _, _) in old.items():
+            path = os.path.join(directory, name)
+            is_dir = name in new and new[name][0]
+            if was_dir and not is_dir:                  # zmizel podadresar i s obsahem
+                changes.extend(('removed', p) for p in self._forget(path))
+            elif not was_dir and (name not in new or is_dir):
+                changes.append(('removed', path))
+        for name, entry in new.items():
+            if entry[0]:
+                subdirs.append(name)
+                continue
+            previous = old.get(name)
+            if previous is None or previous[0]:
+                changes.append(('added', os.path.join(directory, name)))
+            elif previous[1:] != entry[1:]:
+                changes.append(('modified', os.path.join(directory, name)))
+        self._conn.execute('DELETE FROM entries WHERE dir=?', (directory,))
+        self._conn.executemany('INSERT INTO entries VALUES (?, ?, ?, ?, ?)',
+                               [(directory, name) + entry for name, entry in new.items()])
+        return sorted(changes, key=lambda change: change[1])
+
+    def _check_files(self, directory, old, counts):
+        """Stat-ne files nezmeneneho adresare a vrati zmenene (obsah prepsany na miste)."""
+        changes = []
+        for name, (is_dir, size, mtime) in sorted(old.items()):
+            if is_dir:
+                continue
+            counts['stats'] += 1
+            try:
+                info = os.stat(os.path.join(directory, name), follow_symlinks=False)
+            except OSError:
+                continue                    # smazani by zmenilo mtime adresare, pristi scan
+            if (info.st_size, info.st_mtime_ns) != (size, mtime):
+                changes.append(('modified', os.path.join(directory, name)))
+                self._conn.execute('UPDATE entries SET size=?, mtime_ns=? WHERE dir=? AND name=?',
+                                   (info.st_size, info.st_mtime_ns, directory, name))
+        return changes
+
+    def files(self, root):
+        """Generator cest ke vsem files pod root podle indexu, bez pristupu na disk."""
+        root = os.path.abspath(root)
+        rows = self._conn.execute('SELECT dir, name FROM entries WHERE is_dir=0 AND (dir=? OR (dir>=? AND dir<?)) '
+                                  'ORDER BY dir, name', (root, root + '/', root + '0'))
+        for directory, name in rows:
+            yield os.path.join(directory, name)
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def prepare_arguments(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Inkrementalni scan stromu; vypise pridane, smazane '
+                                                 'a zmenene files od minuleho scanu.')
+    parser.add_argument('index', help='SQLite file s indexem')
+    parser.add_argument('adresare', nargs='+')
+    parser.add_argument('--check-files', action='store_true',
+                        help='stat-nout i files v nezmenenych adresarich (najde prepsany obsah)')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    import sys
+    argumenty = prepare_arguments()
+    with ScanIndex(argumenty.index) as index:
+        for adresar in argumenty.adresare:
+            statistika = {}
+            for akce, cesta in index.scan(adresar, argumenty.check_files, statistika,
+                                          lambda chyba: print(chyba, file=sys.stderr)):
+                print('{:9s} {}'.format(akce, cesta))
+            print('{}: {dirs} adresaru, {listed} precteno, {skipped} beze zmeny, {errors} nelze precist'
+                  .format(adresar, **statistika), file=sys.stderr)
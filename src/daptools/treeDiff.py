@@ -0,0 +1,167 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+treeDiff - porovna dva adresarove stromy (napr. zalohu a zdroj) podle obsahu. Files se nejdriv
+paruji podle relativni cesty, velikosti a mtime; hashuji se jen nejasne pary (stejna velikost,
+jina mtime) a files, ktere mohly byt presunuty (jen na jedne strane, ale se stejne velkym
+protejskem na druhe). Obe strany se hashuji soubezne v poolu vlaken.
+Created on 18/10/2026, 13:40
+
+@author: David Potucek
+"""
+
+import os, stat
+
+from .generateSHA import create_hash, _run_bounded
+
+
+def _scan(root, recursive=True):
+    """Vrati slovnik relativni cesta -> os.stat vysledek pro vsechny obycejne files pod root
+    (i pres symlink). FIFO, sockety a zarizeni vynecha, jejich cteni by se zablokovalo."""
+    from .myTools import walk_entries
+    result = {}
+    for entry in walk_entries(root, recursive):
+        try:
+            info = entry.stat()
+        except OSError:
+            continue                        # mezitim zmizel nebo rozbity symlink
+        if stat.S_ISREG(info.st_mode):
+            result[os.path.relpath(entry.path, root)] = info
+    return result
+
+
+def compare_trees(a, b, typex='sha256sum', workers=4, deep=False, recursive=True, cache=None, stats=None):
+    """Generator rozdilu mezi stromy a (puvodni) a b (novy). Vraci prubezne n-tice
+    ('added', cesta), ('removed', cesta), ('modified', cesta) a ('moved', stara, nova), cesty
+    jsou relativni k a resp. b. Nejdriv to, co je jasne bez cteni, pak hashovane pary tak, jak
+    dobehnou. Presun se pozna podle shodneho hashe file, ktery je jen v a, s filem jen v b.
+    File, ktery se od scanu nepodari precist (zmizel, prava), vrati jako ('error', cesta).
+    Rozpracovanych hashu je najednou nejvys 2 * workers.
+    :param typex typ hashe z generateSHA
+    :param workers pocet vlaken pro hashovani
+    :param deep hashovat i pary se stejnou velikosti a mtime (kontrola poskozeni zalohy)
+    :param cache HashCache pro create_hash
+    :param stats slovnik, do ktereho se doplni pocty files na stranach, hashovanych files, bytu
+    a chyb"""
+    from concurrent.futures import ThreadPoolExecutor
+    left, right = _scan(a, recursive), _scan(b, recursive)
+    counts = {'files_a': len(left), 'files_b': len(right), 'hashed': 0, 'read': 0, 'errors': 0}
+    pairs = []                              # spolecne cesty, u kterych rozhodne hash
+    for rel in sorted(left.keys() & right.keys()):
+        one, two = left[rel], right[rel]
+        if one.st_size != two.st_size:
+            yield 'modified', rel
+        elif deep or one.st_mtime_ns != two.st_mtime_ns:
+            pairs.append(rel)
+    removed_by_size, added_by_size = {}, {}
+    for rel in sorted(left.keys() - right.keys()):
+        removed_by_size.setdefault(left[rel].st_size, []).append(rel)
+    for rel in sorted(right.keys() - left.keys()):
+        added_by_size.setdefault(right[rel].st_size, []).append(rel)
+    movable = removed_by_size.keys() & added_by_size.keys()
+    for size in sorted(removed_by_size.keys() - movable):
+        for rel in removed_by_size[size]:
+            yield 'removed', rel
+    for size in sorted(added_by_size.keys() - movable):
+        for rel in added_by_size[size]:
+            yield 'added', rel
+
+    def digest(root, rel):
+        return create_hash(os.path.join(root, rel), typex, cache=cache)[0].hexdigest()
+
+    waiting = {}                            # skupina -> pocet chybejicich hashu
+
+    def tasks():
+        for rel in pairs:
+            group = ('pair', rel)
+            waiting[group] = 2
+            yield (group, ('a', rel)), (digest, (a, rel))
+            yield (group, ('b', rel)), (digest, (b, rel))
+        for size in sorted(movable):
+            group = ('size', size)
+            waiting[group] = len(removed_by_size[size]) + len(added_by_size[size])
+            for rel in removed_by_size[size]:
+                yield (group, ('a', rel)), (digest, (a, rel))
+            for rel in added_by_size[size]:
+                yield (group, ('b', rel)), (digest, (b, rel))
+
+    digests = {}                            # ('a'|'b', cesta) -> hexdigest, None = nejde precist
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = _run_bounded(pool, tasks(), 2 * workers)
+        try:
+            for (group, key), future in results:
+                try:
+                    digests[key] = future.result()
+                    counts['hashed'] += 1
+                    counts['read'] += (left if key[0] == 'a' else right)[key[1]].st_size
+                except OSError:             # zmizel nebo neni citelny od scanu
+                    digests[key] = None
+                    counts['errors'] += 1
+                waiting[group] -= 1
+                if waiting[group]:
+                    continue
+                del waiting[group]
+                if group[0] == 'pair':
+                    rel = group[1]
+                    one, two = digests.pop(('a', rel)), digests.pop(('b', rel))
+                    if one is None or two is None:
+                        yield 'error', rel
+                    elif one != two:
+                        yield 'modified', rel
+                else:
+                    for change in _match_moves(removed_by_size[group[1]], added_by_size[group[1]], digests):
+                        yield change
+        finally:
+            results.close()                 # zrusi cekajici ulohy
+            if stats is not None:
+                stats.update(counts)
+
+
+def _match_moves(removed, added, digests):
+    """Sparuje files jen v a s files jen v b podle hashe (vse stejne velikosti). Vraci seznam
+    zmen; nesparovane files jsou removed/added, neprectene error."""
+    by_digest, changes = {}, []
+    for rel in removed:
+        digest = digests.pop(('a', rel))
+        if digest is None:
+            changes.append(('error', rel))
+        else:
+            by_digest.setdefault(digest, []).append(rel)
+    unmatched = []
+    for rel in added:
+        digest = digests.pop(('b', rel))
+        olds = by_digest.get(digest)
+        if digest is None:
+            changes.append(('error', rel))
+        elif olds:
+            changes.append(('moved', olds.pop(0), rel))
+        else:
+            unmatched.append(rel)
+    changes.extend(('removed', rel) for olds in by_digest.values() for rel in olds)
+    changes.extend(('added', rel) for rel in unmatched)
+    return changes
+
+
+def prepare_arguments(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Porovna dva adresarove stromy podle obsahu.')
+    parser.add_argument('puvodni')
+    parser.add_argument('novy')
+    parser.add_argument('--type', default='sha256sum', help='typ hashe')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--deep', action='store_true', help='hashovat i files se stejnou velikosti a mtime')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    import sys
+    argumenty = prepare_arguments()
+    rozdily = 0
+    for zmena in compare_trees(argumenty.puvodni, argumenty.novy, argumenty.type, argumenty.workers,
+                               argumenty.deep):
+        rozdily += 1
+        if zmena[0] == 'moved':
+            print('moved     {} -> {}'.format(zmena[1], zmena[2]))
+        else:
+            print('{:9s} {}'.format(*zmena))
+    sys.exit(1 if rozdily else 0)
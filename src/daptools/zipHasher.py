@@ -0,0 +1,159 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""
+zipHasher - hashe jednotlivych files uvnitr zip archivu bez rozbalovani na disk. Member se
+dekomprimuje proudove rovnou do hashlib (generateSHA.hash_stream). Vic archivu i members
+jednoho archivu se zpracovava soubezne v omezenem poolu vlaken; zlib pri dekompresi i hashlib
+uvolnuji GIL. Rychla cesta crc_only vezme jen CRC32 ulozene v centralnim adresari archivu
+a data vubec necte.
+Created on 18/10/2026, 14:25
+
+@author: David Potucek
+"""
+
+import os, zipfile, zlib
+from collections import OrderedDict as od
+
+from .generateSHA import hash_stream, _new_hashers, _run_bounded, DEFAULT_BUFFER_SIZE
+
+BATCH_BYTES = 64 * 1024 * 1024      # kolik komprimovanych dat jednoho archivu dostane jedna uloha
+__ZIP_ERRORS__ = (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError, EOFError, OSError)
+
+
+def _batches(infos, batch_bytes):
+    """Rozdeli members (serazene podle pozice v archivu) do skupin o zhruba batch_bytes
+    komprimovanych dat, aby drobne members nestaly kazdy jednu ulohu."""
+    batches, batch, size = [], [], 0
+    for info in infos:
+        batch.append(info)
+        size += info.compress_size
+        if size >= batch_bytes:
+            batches.append(batch)
+            batch, size = [], 0
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _hash_batch(archive, infos, types, buffer_size, skip_errors):
+    """Worker: zahashuje members jednoho otevreneho ZipFile. Cteni ruznych members z jednoho
+    ZipFile z vice vlaken zipfile podporuje. Vrati seznam (jmeno, OrderedDict nebo None)."""
+    result = []
+    for info in infos:
+        try:
+            with archive.open(info) as member:     # na konci member zipfile overi CRC32
+                result.append((info.filename, hash_stream(member, types, buffer_size=buffer_size)))
+        except __ZIP_ERRORS__:
+            if not skip_errors:
+                raise
+            result.append((info.filename, None))
+    return result
+
+
+def find_archives(root, suffixes=('.zip',), recursive=True):
+    """Vrati serazeny seznam archivu pod adresarem root podle pripony."""
+    from .myTools import walk_entries
+    return sorted(entry.path for entry in walk_entries(root, recursive, extensions=suffixes))
+
+
+def hash_archives(paths, algorithms=('sha256sum',), workers=None, crc_only=False, skip_errors=False,
+                  buffer_size=DEFAULT_BUFFER_SIZE, batch_bytes=BATCH_BYTES):
+    """Generator dvojic ((archiv, member), OrderedDict typ -> hexdigest) pro vsechny files
+    v archivech. Poradi odpovida dokonceni uloh, ne poradi v archivu. Adresare v archivu se
+    preskakuji. Otevrenych je jen tolik archivu, kolik je rozpracovanych uloh.
+    :param paths archiv, adresar s archivy (viz find_archives), nebo seznam archivu
+    :param algorithms typ nebo seznam typu z generateSHA.ALL_TYPES
+    :param workers pocet vlaken, default pocet CPU
+    :param crc_only misto hashu vratit {'crc32': hex} z centralniho adresare, bez cteni dat;
+    staci tam, kde se porovnava s drivejsim vypisem tehoz archivu, ne jako ochrana proti zmene
+    :param skip_errors poskozeny archiv nebo member vrati s None (archiv s memberem None), jinak vyjimka
+    :param batch_bytes velikost jedne ulohy v komprimovanych bytech"""
+    from concurrent.futures import ThreadPoolExecutor
+    if isinstance(paths, str):
+        paths = find_archives(paths) if os.path.isdir(paths) else [paths]
+    types = [algorithms] if isinstance(algorithms, str) else list(algorithms)
+    _new_hashers(types)                     # neplatny typ chceme hned, ne az z workeru
+    if crc_only:
+        for path in paths:
+            try:
+                with zipfile.ZipFile(path) as archive:
+                    infos = [info for info in archive.infolist() if not info.is_dir()]
+            except __ZIP_ERRORS__:
+                if not skip_errors:
+                    raise
+                yield (path, None), None
+                continue
+            for info in infos:
+                yield (path, info.filename), od([('crc32', '{:08x}'.format(info.CRC))])
+        return
+    workers = workers or os.cpu_count() or 1
+    opened = {}                             # archiv -> [ZipFile, pocet nedokoncenych uloh]
+
+    def tasks():
+        for path in paths:
+            try:
+                archive = zipfile.ZipFile(path)
+            except __ZIP_ERRORS__:
+                if not skip_errors:
+                    raise
+                yield (path, None), None
+                continue
+            infos = sorted((info for info in archive.infolist() if not info.is_dir()),
+                           key=lambda info: info.header_offset)     # cteni po poradi v archivu
+            batches = _batches(infos, batch_bytes)
+            if not batches:
+                archive.close()
+                continue
+            opened[path] = [archive, len(batches)]
+            for batch in batches:
+                yield (path, batch), (_hash_batch, (archive, batch, types, buffer_size, skip_errors))
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = _run_bounded(pool, tasks(), 2 * workers)
+            try:
+                for (path, _), future in results:
+                    if future is None:      # archiv nejde otevrit
+                        yield (path, None), None
+                        continue
+                    for name, digests in future.result():
+                        yield (path, name), digests
+                    opened[path][1] -= 1
+                    if not opened[path][1]:
+                        opened.pop(path)[0].close()
+            finally:
+                results.close()             # zrusi cekajici ulohy, pool pak dobehne rozpracovane
+    finally:
+        for archive, _ in opened.values():
+            archive.close()
+
+
+def prepare_arguments(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Hashe files uvnitr zip archivu bez rozbaleni. '
+                                                 'Vystup ve formatu *sum, jmeno je archiv:member.')
+    parser.add_argument('archivy', nargs='+', help='zip archivy nebo adresare s nimi')
+    parser.add_argument('--types', default='sha256sum', help='typy hashe oddelene carkou')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--crc-only', action='store_true', help='jen CRC32 z adresare archivu, bez cteni dat')
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    import sys
+    argumenty = prepare_arguments()
+    typy = argumenty.types.split(',')
+    cesty = []
+    for cesta in argumenty.archivy:
+        cesty.extend(find_archives(cesta) if os.path.isdir(cesta) else [cesta])
+    chyby = 0
+    for (archiv, member), hashe in hash_archives(cesty, typy, argumenty.workers, argumenty.crc_only,
+                                                 skip_errors=True):
+        if hashe is None:
+            chyby += 1
+            print('{}: nelze precist'.format(archiv if member is None else archiv + ':' + member), file=sys.stderr)
+            continue
+        for typ, digest in hashe.items():
+            prefix = '' if len(hashe) == 1 else typ + ' '
+            print('{}{}  {}:{}'.format(prefix, digest, archiv, member))
+    sys.exit(1 if chyby else 0)
@@ -8,7 +8,8 @@ import unittest
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
-from daptools.binUtils import bytes2bin, bin2bytes, bin2dec, dec2bin, bytes2str
+from daptools.binUtils import bytes2bin, bin2bytes, bin2dec, dec2bin, bytes2str, bytes2dec, bit_bytes, \
+    bits_from_bytes, bytes_from_bits, hex_escape, BitArray
 
 
 class TestBinUtils(unittest.TestCase):
@@ -37,6 +38,58 @@ class TestBinUtils(unittest.TestCase):
         self.assertIn('\\x01', result)
         self.assertIn('\\x02', result)
 
+    def test_bytes_native(self):
+        data = bytes(range(256))
+        self.assertEqual(bits_from_bytes(b'\x05\x80'), [0, 0, 0, 0, 0, 1, 0, 1, 1, 0, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(bits_from_bytes(memoryview(b'\x05\xff'), 3), [1, 0, 1, 1, 1, 1])
+        self.assertEqual(bytes_from_bits(bits_from_bytes(data)), data)
+        self.assertEqual(bytes_from_bits(bit_bytes(bytearray(data))), data)
+        self.assertEqual(bytes_from_bits([1, 0, 0, 0, 0, 0, 0, 0, 1]), b'\x01\x01')
+        self.assertEqual(bytes_from_bits([]), b'')
+        self.assertEqual(hex_escape(b'\x01\xab'), '\\x01\\xab')
+        self.assertEqual(hex_escape(b''), '')
+        self.assertRaises(ValueError, bit_bytes, b'x', 9)
+
+    def test_wrappers_accept_bytes(self):
+        self.assertEqual(bytes2bin(b'\x01\x02'), bytes2bin('\x01\x02'))
+        self.assertEqual(bytes2bin('\x1ff', 4), [1, 1, 1, 1, 0, 1, 1, 0])
+        self.assertEqual(bytes2bin(''), [0])
+        self.assertEqual(bin2bytes(bytes2bin('ab\xff')), 'ab\xff')
+        self.assertEqual(bytes2str(b'\x01\x02'), bytes2str('\x01\x02'))
+        self.assertEqual(bytes2dec(b'\x01\x00'), 256)
+
+    def test_bitarray(self):
+        bits = BitArray([1, 0, 1, 1, 0, 0, 1, 0, 1])
+        self.assertEqual(len(bits), 9)
+        self.assertEqual(bits.to_bytes(), b'\xb2\x80')
+        self.assertEqual(int(bits), 0b101100101)
+        self.assertEqual((bits[0], bits[-1]), (1, 1))
+        self.assertEqual(bits[2:6].tolist(), [1, 1, 0, 0])
+        self.assertEqual(bits[::4].to01(), '101')
+        self.assertEqual((bits << 2).to01(), '110010100')
+        self.assertEqual((bits >> 3).to01(), '000101100')
+        self.assertEqual((~bits).to01(), '010011010')
+        other = BitArray.from_int(0b110000001, 9)
+        self.assertEqual((bits & other).to01(), '100000001')
+        self.assertEqual((bits | other).to01(), '111100101')
+        self.assertEqual((bits ^ other).popcount(), 4)
+        self.assertRaises(ValueError, lambda: bits & BitArray([1]))
+        bits[1] = 1
+        bits.append(1)
+        self.assertEqual(bits.to01(), '1111001011')
+        self.assertEqual(bits + [0, 1], BitArray.from_int(0b111100101101, 12))
+        self.assertEqual(BitArray.from_bytes(b'\x0f\xf0', 4).to01(), '11110000')
+        self.assertEqual(BitArray.from_int(0).to01(), '0')
+        self.assertEqual(bytes(BitArray([1, 0, 1])), b'\x01\x00\x01')     # iterates bits, no int() zeros
+        self.assertRaises(TypeError, lambda: [0, 1][BitArray([1])])
+
+    def test_bitarray_in_api(self):
+        self.assertEqual(dec2bin(5, 8, as_bitarray=True), BitArray([0, 0, 0, 0, 0, 1, 0, 1]))
+        self.assertEqual(bytes2bin(b'\x01\x02', as_bitarray=True).tolist(), bytes2bin('\x01\x02'))
+        self.assertEqual(bin2dec(BitArray.from_bytes(b'\x01\x00')), 256)
+        self.assertEqual(bin2bytes(BitArray([1, 0, 0, 0, 0, 0, 0, 0, 1])), '\x01\x01')
+        self.assertEqual(dec2bin(0, 4), [0, 0, 0, 0])
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,90 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Unit tests for bulkRename module.
+"""
+
+import unittest
+import tempfile
+import json
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+from daptools.bulkRename import plan_renames, execute_plan, bulk_rename, resume, rollback
+from daptools.myTools import rename_files
+
+
+class TestBulkRename(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make(self, *names):
+        for name in names:
+            with open(self.path(name), 'w') as fh:
+                fh.write(name)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def contents(self):
+        result = {}
+        for name in os.listdir(self.dir):
+            if not name.endswith('.journal'):
+                with open(self.path(name)) as fh:
+                    result[name] = fh.read()
+        return result
+
+    def test_chains_and_cycles(self):
+        self.make('a', 'b', 'c', 'x', 'y', 'z', 'same')
+        mapping = {'a': 'b', 'b': 'a', 'x': 'y', 'y': 'z', 'z': 'w', 'c': 'd', 'same': 'same'}
+        steps = plan_renames({self.path(k): self.path(v) for k, v in mapping.items()})
+        self.assertEqual(len(steps), 3 + 3 + 1)      # cyklus a<->b stoji jedno docasne jmeno navic
+        self.assertEqual(bulk_rename({self.path(k): self.path(v) for k, v in mapping.items()}), 7)
+        self.assertEqual(self.contents(), {'a': 'b', 'b': 'a', 'w': 'z', 'z': 'y', 'y': 'x', 'd': 'c',
+                                           'same': 'same'})
+
+    def test_long_cycle(self):
+        names = ['f{}'.format(i) for i in range(10)]
+        self.make(*names)
+        rename_files({self.path(n): self.path(names[(i + 1) % 10]) for i, n in enumerate(names)})
+        self.assertEqual(self.contents(), {names[(i + 1) % 10]: n for i, n in enumerate(names)})
+
+    def test_conflicts(self):
+        self.make('a', 'b', 'c')
+        with self.assertRaises(ValueError):                 # stejny cil
+            plan_renames({self.path('a'): self.path('x'), self.path('b'): self.path('x')})
+        with self.assertRaises(ValueError):                 # cil existuje a neuvolni se
+            plan_renames({self.path('a'): self.path('c')})
+        with self.assertRaises(ValueError):                 # zdroj chybi
+            plan_renames({self.path('missing'): self.path('x')})
+        rename_files({self.path('a'): self.path('c')})      # rename_files prepisuje jako driv
+        self.assertEqual(self.contents(), {'b': 'b', 'c': 'a'})
+
+    def test_journal_resume_and_rollback(self):
+        self.make('a', 'b', 'c')
+        journal = self.path('plan.journal')
+        mapping = {self.path('a'): self.path('b'), self.path('b'): self.path('c'), self.path('c'): self.path('a')}
+        steps = plan_renames(mapping)
+        with open(journal, 'w') as fh:                     # simulace padu po dvou krocich
+            fh.write(json.dumps({'format': 'daptools-rename-1', 'steps': steps}) + '\n')
+            fh.write('done 0\n')
+        execute_plan(steps[:2])                             # druhy krok se do zurnalu nezapsal
+        self.assertEqual(resume(journal), 2)
+        self.assertFalse(os.path.exists(journal))
+        self.assertEqual(self.contents(), {'b': 'a', 'c': 'b', 'a': 'c'})
+
+        steps = plan_renames({self.path('a'): self.path('x')})
+        with open(journal, 'w') as fh:
+            fh.write(json.dumps({'format': 'daptools-rename-1', 'steps': steps}) + '\n')
+        execute_plan(steps)
+        self.assertEqual(rollback(journal), 1)
+        self.assertEqual(self.contents(), {'b': 'a', 'c': 'b', 'a': 'c'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,7 +9,7 @@ import tempfile
 import os
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
-from daptools.cleanDir import filter_files
+from daptools.cleanDir import filter_files, clean_tree, watch_tree, apply_policy, parse_size
 from daptools.myTools import get_file_extension
 
 
@@ -33,6 +33,127 @@ class TestCleanDir(unittest.TestCase):
         filtered = filter_files([])
         self.assertEqual(len(filtered), 0)
 
+    def test_clean_tree(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            files = {'doc.tex': 10, 'doc.aux': 20, 'doc.log': 30, 'a/b.aux': 40, 'a/b/c.gz': 50,
+                     'a/b/keep.pdf': 60, 'x.log/inner.tex': 5}
+            for name, size in files.items():
+                path = os.path.join(tmpdir, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as fh:
+                    fh.write(b'x' * size)
+
+            report = clean_tree(tmpdir, dry_run=True, workers=2)
+            self.assertEqual((report['files'], report['bytes'], report['dirs']), (4, 140, 4))
+            self.assertTrue(os.path.exists(os.path.join(tmpdir, 'doc.aux')))
+
+            report = clean_tree(tmpdir, recursive=False)
+            self.assertEqual(sorted(os.path.basename(p) for p, _ in report['removed']), ['doc.aux', 'doc.log'])
+            report = clean_tree(tmpdir, patterns=('*.gz', 'keep.*'), workers=2)
+            self.assertEqual(report['bytes'], 110)
+            left = sorted(os.path.relpath(os.path.join(d, f), tmpdir) for d, _, fs in os.walk(tmpdir) for f in fs)
+            self.assertEqual(left, ['a/b.aux', 'doc.tex', 'x.log/inner.tex'])
+            self.assertEqual(clean_tree(os.path.join(tmpdir, 'missing'))['errors'][0][0],
+                             os.path.join(tmpdir, 'missing'))
+
+    def test_apply_policy(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            now = 1000 * 86400
+            files = {'a': (100, 1), 'b': (200, 2), 'sub/c': (300, 3), 'sub/d': (50, 4), 'e': (10, 500)}
+            for name, (size, age_days) in files.items():
+                path = os.path.join(tmpdir, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as fh:
+                    fh.write(b'x' * size)
+                os.utime(path, (now - age_days * 86400, now - age_days * 86400))
+
+            def names(report):
+                return sorted(os.path.relpath(path, tmpdir) for path, _ in report['removed'])
+
+            report = apply_policy(tmpdir, max_bytes=400, dry_run=True, now=now)
+            self.assertEqual(names(report), ['e', os.path.join('sub', 'c'), os.path.join('sub', 'd')])
+            self.assertEqual((report['scanned'], report['scanned_bytes'], report['remaining_bytes']), (5, 660, 300))
+            self.assertEqual(set(report['times']), {'scan', 'select', 'delete'})
+            report = apply_policy(tmpdir, max_bytes=400, order='largest', dry_run=True, now=now)
+            self.assertEqual(names(report), [os.path.join('sub', 'c')])
+            report = apply_policy(tmpdir, older_than_days=3.5, now=now)
+            self.assertEqual((report['aged'], report['quota'], report['bytes']), (2, 0, 60))
+            report = apply_policy(tmpdir, max_bytes=250, older_than_days=2.5, now=now)
+            self.assertEqual(names(report), ['b', os.path.join('sub', 'c')])
+            self.assertEqual((report['aged'], report['quota'], report['remaining_bytes']), (1, 1, 100))
+            self.assertEqual(sorted(os.listdir(tmpdir)), ['a', 'sub'])
+            self.assertRaises(ValueError, apply_policy, tmpdir, 1, order='newest')
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size('4096'), 4096)
+        self.assertEqual(parse_size('1.5k'), 1536)
+        self.assertEqual(parse_size('10GB'), 10 * 1024 ** 3)
+
+    def _check_watch(self, use_inotify):
+        import threading
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stop = threading.Event()
+            timer = threading.Timer(10, stop.set)       # safety, test must not hang
+            timer.start()
+
+            def build():
+                os.makedirs(os.path.join(tmpdir, 'sub'))
+                for name in ('doc.tex', 'doc.aux', 'sub/ch.log'):
+                    with open(os.path.join(tmpdir, name), 'w') as fh:
+                        fh.write('x')
+
+            watch = watch_tree(tmpdir, debounce=0.1, stop=stop, use_inotify=use_inotify, poll_interval=0.05)
+            threading.Timer(0.3, build).start()
+            removed = []
+            try:
+                for _, files in watch:
+                    removed.extend(os.path.relpath(path, tmpdir) for path, _ in files)
+                    if len(removed) == 2:
+                        break
+            finally:
+                watch.close()
+                timer.cancel()
+            self.assertEqual(sorted(removed), ['doc.aux', os.path.join('sub', 'ch.log')])
+            self.assertTrue(os.path.exists(os.path.join(tmpdir, 'doc.tex')))
+
+    def _check_slow_writer(self, use_inotify, pauses, idle_first=0):
+        import threading, time
+        with tempfile.TemporaryDirectory() as tmpdir:
+            stop = threading.Event()
+            timer = threading.Timer(10, stop.set)
+            timer.start()
+            closed = []
+
+            def write():
+                with open(os.path.join(tmpdir, 'doc.log'), 'w') as fh:
+                    time.sleep(idle_first)                  # created, nothing written yet
+                    for pause in pauses:                # longer than debounce in total
+                        fh.write('x' * 100)
+                        fh.flush()
+                        time.sleep(pause)
+                closed.append(time.monotonic())
+
+            watch = watch_tree(tmpdir, debounce=0.3, stop=stop, use_inotify=use_inotify, poll_interval=0.05)
+            threading.Timer(0.2, write).start()
+            try:
+                removed = next(watch)[1]
+                removed_at = time.monotonic()
+            finally:
+                watch.close()
+                timer.cancel()
+            self.assertEqual(removed[0][0], os.path.join(tmpdir, 'doc.log'))
+            self.assertTrue(closed and removed_at >= closed[0])
+
+    def test_watch_tree_inotify(self):
+        self._check_watch(True)
+        self._check_slow_writer(True, [0.1] * 12)
+        self._check_slow_writer(True, [0.8, 0.1])       # open and idle longer than debounce
+        self._check_slow_writer(True, [0.1], idle_first=1.0)
+
+    def test_watch_tree_polling(self):
+        self._check_watch(False)
+        self._check_slow_writer(False, [0.1] * 12)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,116 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Unit tests for dupFinder module.
+"""
+
+import unittest
+import tempfile
+import hashlib
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+from daptools.dupFinder import find_duplicates, partial_digest, link_duplicates, delete_duplicates
+
+
+class TestDupFinder(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = self.tmpdir.name
+        os.mkdir(os.path.join(self.root, 'sub'))
+        big = os.urandom(300 * 1024)
+        middle_changed = bytearray(big)
+        middle_changed[150 * 1024] ^= 0xff          # stejny zacatek i konec, jiny obsah
+        self.files = {
+            'a.mp3': big, os.path.join('sub', 'b.mp3'): big, 'c.mp3': bytes(middle_changed),
+            'd.jpg': b'small', os.path.join('sub', 'e.jpg'): b'small', 'f.jpg': b'other',
+            'unique.bin': b'x' * 1234, 'empty1': b'', 'empty2': b''
+        }
+        for name, data in self.files.items():
+            with open(os.path.join(self.root, name), 'wb') as fh:
+                fh.write(data)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _names(self, groups):
+        return sorted(sorted(os.path.relpath(p, self.root) for p in g['files']) for g in groups)
+
+    def test_partial_digest(self):
+        path = os.path.join(self.root, 'd.jpg')
+        digest, read = partial_digest(path, 5)
+        self.assertEqual(digest, hashlib.sha256(b'small').hexdigest())
+        self.assertEqual(read, 5)
+
+    def test_find_duplicates(self):
+        stats = {}
+        groups = find_duplicates(self.root, workers=2, stats=stats)
+        self.assertEqual(self._names(groups), [['a.mp3', os.path.join('sub', 'b.mp3')],
+                                               ['d.jpg', os.path.join('sub', 'e.jpg')]])
+        self.assertEqual(groups[0]['digest'], hashlib.sha256(self.files['a.mp3']).hexdigest())
+        self.assertEqual(stats['size_candidates'], 6)
+        self.assertEqual(stats['partial_candidates'], 5)
+        self.assertEqual(stats['full_read'], 3 * 300 * 1024)     # c.mp3 se muselo precist cele
+        self.assertEqual(stats['partial_read'], 3 * 2 * 64 * 1024 + 3 * 5)     # hlava a pata, male cele
+
+    def test_partial_step_separates_head_and_tail(self):
+        base = os.urandom(300 * 1024)
+        variants = {'base.bin': base, 'head.bin': bytes([base[0] ^ 0xff]) + base[1:],
+                    'tail.bin': base[:-1] + bytes([base[-1] ^ 0xff])}
+        sub = os.path.join(self.root, 'partial')
+        os.mkdir(sub)
+        for name, data in variants.items():
+            with open(os.path.join(sub, name), 'wb') as fh:
+                fh.write(data)
+        stats = {}
+        self.assertEqual(find_duplicates(sub, stats=stats), [])
+        self.assertEqual(stats['partial_read'], 3 * 2 * 64 * 1024)    # prvni a posledni blok
+        self.assertEqual(stats['full_read'], 0)
+
+    def test_hardlinks_are_not_duplicates(self):
+        os.link(os.path.join(self.root, 'unique.bin'), os.path.join(self.root, 'unique.lnk'))
+        groups = find_duplicates(self.root)
+        self.assertNotIn(['unique.bin', 'unique.lnk'], self._names(groups))
+
+    def test_link_and_delete(self):
+        groups = find_duplicates(self.root)
+        self.assertEqual([a for a, _ in link_duplicates(groups, dry_run=True)], ['link', 'link'])
+        link_duplicates(groups[:1])
+        first, second = groups[0]['files']
+        self.assertTrue(os.path.samefile(first, second))
+        self.assertEqual(find_duplicates(self.root)[0]['files'], groups[1]['files'])
+
+        os.remove(groups[1]['files'][1])                    # zmizi mezi hledanim a linkovanim
+        self.assertEqual(link_duplicates(groups[1:]), [('skip', groups[1]['files'][1])])
+        with open(groups[1]['files'][1], 'wb') as fh:
+            fh.write(self.files['d.jpg'])
+
+        actions = delete_duplicates(find_duplicates(self.root))
+        self.assertEqual(actions, [('delete', groups[1]['files'][1])])
+        self.assertFalse(os.path.exists(groups[1]['files'][1]))
+
+    def test_edited_in_place_is_skipped(self):
+        import json
+        groups = json.loads(json.dumps(find_duplicates(self.root)))    # razitka preziji JSON
+        small = [g for g in groups if g['size'] == len(b'small')]
+        keep, copy = small[0]['files']
+        info = os.stat(copy)
+        with open(copy, 'r+b') as fh:                                   # stejna velikost, jiny obsah
+            fh.write(b'SMALL')
+        os.utime(copy, ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+        self.assertEqual(delete_duplicates(small), [('skip', copy)])
+        self.assertEqual(link_duplicates(small), [('skip', copy)])
+        with open(copy, 'rb') as fh:
+            self.assertEqual(fh.read(), b'SMALL')
+        self.assertFalse(os.path.samefile(keep, copy))
+
+        big = [g for g in groups if g['size'] != len(b'small')]
+        keep, copy = big[0]['files']
+        os.utime(keep, ns=(info.st_atime_ns, os.stat(keep).st_mtime_ns + 10 ** 9))  # zmeneny prvni
+        self.assertEqual(delete_duplicates(big), [('skip', copy)])
+        self.assertTrue(os.path.exists(copy))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,7 +9,8 @@ import tempfile
 import os
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
-from daptools.fileHasher import strip_first_alphanumeric, hash_names, remove_numbers_from_files
+from daptools.fileHasher import strip_first_alphanumeric, hash_names, remove_numbers_from_files, \
+    validate_files, plan_hash_names, plan_library
 
 
 class TestFileHasher(unittest.TestCase):
@@ -31,6 +32,37 @@ class TestFileHasher(unittest.TestCase):
             self.assertIsInstance(result, dict)
             self.assertEqual(len(result), 1)
 
+    def test_hash_names_order(self):
+        names = ['/music/a/{:03d}-song{}.mp3'.format(i, i) for i in range(20)] + ['/music/b/x.mp3', '/music/b/y.mp3']
+        first = hash_names(names, seed=7)
+        self.assertEqual(first, hash_names(names, seed=7))              # stejny seed, stejne poradi
+        self.assertEqual(sorted(first), sorted(names))
+        self.assertEqual(sorted(v[:12] for k, v in first.items() if '/b/' in k), ['/music/b/001', '/music/b/002'])
+        self.assertEqual(len(set(first.values())), len(names))
+        kept = hash_names(names[:3], randomize=1)                     # poradi zachovano
+        self.assertEqual(list(kept.values()), ['/music/a/001-song0.mp3', '/music/a/002-song1.mp3',
+                                               '/music/a/003-song2.mp3'])
+        big = ['/lib/t{}.mp3'.format(i) for i in range(1000)]
+        self.assertTrue(all(v.startswith('/lib/') and v[9] == '-' for v in hash_names(big).values()))
+        self.assertFalse(isinstance(plan_hash_names(names), dict))
+
+    def test_validate_files(self):
+        names = ['/d/no_ext', '/d/.DS_Store', '/d/also_no_ext', '/d/ok.mp3', '/d/S']
+        self.assertEqual(validate_files(names), '/d/')
+        self.assertEqual(names, ['/d/ok.mp3'])
+
+    def test_plan_library(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ('a/1.mp3', 'a/2.mp3', 'b/c/3.mp3', 'b/c/noext', '4.mp3'):
+                path = os.path.join(tmpdir, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                open(path, 'w').close()
+            plan = dict(plan_library(tmpdir, seed=1))
+            self.assertEqual(len(plan), 4)
+            for old, new in plan.items():
+                self.assertEqual(os.path.dirname(old), os.path.dirname(new))
+            self.assertEqual(sorted(os.path.basename(v)[:3] for v in plan.values()), ['001', '001', '001', '002'])
+
     def test_remove_numbers_from_files(self):
         with tempfile.TemporaryDirectory() as tmpdir:
             file1 = os.path.join(tmpdir, '001-test.txt')
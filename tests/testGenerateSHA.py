@@ -6,10 +6,16 @@ Unit tests for generateSHA module.
 
 import unittest
 import tempfile
+import hashlib
+import io
+import gzip
+import json
 import os
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
-from daptools.generateSHA import get_hashsums, create_hash, validate_file
+from daptools.generateSHA import get_hashsums, create_hash, validate_file, benchmark, hash_tree, \
+    parse_manifest, check_manifest, hash_stream, benchmark_algorithms, select_fastest, ALL_TYPES, \
+    HashProgress, order_files, physical_offset, benchmark_order
 
 
 class TestGenerateSHA(unittest.TestCase):
@@ -51,6 +57,297 @@ class TestGenerateSHA(unittest.TestCase):
         self.assertFalse(result)
         os.unlink(tmp_path)
 
+    def test_buffer_and_mmap_modes(self):
+        data = os.urandom(3 * 4096 + 17)        # nekonci na hranici bufferu
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(data)
+            tmp_path = tmp.name
+
+        expected = hashlib.sha512(data).hexdigest()
+        for buffer_size in (1, 1024, 4096, 1 << 20):
+            for use_mmap in (False, True):
+                hashes = get_hashsums(tmp_path, buffer_size, use_mmap)
+                self.assertEqual(hashes['sha512sum'], expected)
+                self.assertEqual(hashes['md5sum'], hashlib.md5(data).hexdigest())
+        for use_mmap in (False, True):
+            hashes = get_hashsums(tmp_path, 4096, use_mmap, parallel=True)
+            self.assertEqual(hashes, get_hashsums(tmp_path))
+        hash_obj, _ = create_hash(tmp_path, 'sha1sum', 4096, True)
+        self.assertEqual(hash_obj.hexdigest(), hashlib.sha1(data).hexdigest())
+        os.unlink(tmp_path)
+
+    def test_empty_file_mmap(self):
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp_path = tmp.name
+
+        hashes = get_hashsums(tmp_path, use_mmap=True)
+        self.assertEqual(hashes['sha256sum'], hashlib.sha256(b'').hexdigest())
+        os.unlink(tmp_path)
+
+    def test_invalid_type(self):
+        with self.assertRaises(ValueError):
+            create_hash(__file__, 'crc32')
+
+    def test_benchmark(self):
+        results = benchmark({'tiny': (1000, 2)})
+        self.assertEqual(list(results['tiny'].keys()), ['1KiB', 'buffer', 'mmap', 'parallel'])
+        self.assertTrue(all(v > 0 for v in results['tiny'].values()))
+
+    def test_hash_tree(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.mkdir(os.path.join(tmpdir, 'sub'))
+            expected = {}
+            for i, name in enumerate(['a.bin', 'b.bin', os.path.join('sub', 'c.bin')]):
+                path = os.path.join(tmpdir, name)
+                data = os.urandom(1000 * i + 1)
+                with open(path, 'wb') as fh:
+                    fh.write(data)
+                expected[path.replace(os.sep, '/')] = hashlib.sha256(data).hexdigest()
+
+            for use_processes in (False, True):
+                results = hash_tree(tmpdir, ['sha256sum', 'md5sum'], workers=2, use_processes=use_processes)
+                self.assertFalse(isinstance(results, (tuple, list)))     # streamuje
+                got = {path.replace(os.sep, '/'): d['sha256sum'] for path, d in results}
+                self.assertEqual(got, expected)
+
+            flat = dict(hash_tree(tmpdir, 'sha1sum', recursive=False))
+            self.assertEqual(len(flat), 2)
+
+    def test_hash_tree_skip_errors(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.symlink(os.path.join(tmpdir, 'missing'), os.path.join(tmpdir, 'broken'))
+            self.assertEqual(list(hash_tree(tmpdir, skip_errors=True)), [(tmpdir + '/broken', None)])
+            with self.assertRaises(OSError):
+                list(hash_tree(tmpdir))
+            with self.assertRaises(ValueError):
+                list(hash_tree(tmpdir, 'crc32'))
+
+    @unittest.skipUnless(hasattr(os, 'mkfifo'), 'needs os.mkfifo')
+    def test_hash_tree_skips_fifo(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            os.mkfifo(os.path.join(tmpdir, 'pipe'))         # otevreni by viselo
+            os.symlink(os.path.join(tmpdir, 'pipe'), os.path.join(tmpdir, 'link'))
+            with open(os.path.join(tmpdir, 'a.bin'), 'wb') as fh:
+                fh.write(b'abc')
+            self.assertEqual([path for path, _ in hash_tree(tmpdir, skip_errors=True)],
+                             [os.path.join(tmpdir, 'a.bin')])
+            self.assertEqual(list(benchmark_order(tmpdir, ['walk'])), ['walk'])
+
+    def test_parse_manifest(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manifest = os.path.join(tmpdir, 'SUMS')
+            with open(manifest, 'w') as fh:
+                fh.write('# komentar\n')
+                fh.write('{}  a.txt\n'.format('a' * 64))
+                fh.write('{} *b.bin\n'.format('B' * 32))
+                fh.write('SHA1 (c d.txt) = {}\n'.format('c' * 40))
+                fh.write('\\{}  new\\nline\n'.format('d' * 128))
+                fh.write('neni manifest\n')
+            entries = list(parse_manifest(manifest))
+            self.assertEqual(entries, [('sha256sum', 'a' * 64, 'a.txt'), ('md5sum', 'b' * 32, 'b.bin'),
+                                       ('sha1sum', 'c' * 40, 'c d.txt'), ('sha512sum', 'd' * 128, 'new\nline')])
+            with self.assertRaises(ValueError):
+                list(parse_manifest(manifest, strict=True))
+            stats = {}
+            self.assertEqual(len(list(parse_manifest(manifest, stats=stats))), 4)
+            self.assertEqual(stats['malformed'], 1)
+            with self.assertRaises(ValueError):                 # bez "sum" by se zahodilo vse
+                list(parse_manifest(manifest, 'sha256'))
+
+    def test_check_manifest(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            contents = {'ok.txt': b'ok', 'empty.txt': b'', 'bad.txt': b'bad'}
+            for name, data in contents.items():
+                with open(os.path.join(tmpdir, name), 'wb') as fh:
+                    fh.write(data)
+            manifest = os.path.join(tmpdir, 'SUMS')
+            with open(manifest, 'w') as fh:
+                fh.write('{}  ok.txt\n'.format(hashlib.sha256(b'ok').hexdigest()))
+                fh.write('{}  ok.txt\n'.format(hashlib.md5(b'ok').hexdigest()))
+                fh.write('{}  empty.txt\n'.format(hashlib.sha1(b'').hexdigest()))
+                fh.write('{}  bad.txt\n'.format(hashlib.sha256(b'good').hexdigest()))
+                fh.write('{}  gone.txt\n'.format(hashlib.sha256(b'').hexdigest()))
+            stats = {}
+            results = dict(check_manifest(manifest, workers=2, base_dir=tmpdir, stats=stats))
+            results = {os.path.basename(k): v for k, v in results.items()}
+            self.assertEqual(results, {'ok.txt': 'OK', 'empty.txt': 'OK', 'bad.txt': 'FAILED',
+                                       'gone.txt': 'MISSING'})
+            self.assertEqual((stats['files'], stats['ok'], stats['failed'], stats['missing']), (4, 2, 1, 1))
+            self.assertEqual(stats['read'], 5)          # prazdny file se necte
+
+            results = list(check_manifest(manifest, base_dir=tmpdir, fail_fast=True))
+            self.assertEqual(results[-1][1], 'MISSING')
+            self.assertEqual(len(results), 1)
+            for typex in ('sha256', 'auto'):
+                with self.assertRaises(ValueError):
+                    list(check_manifest(manifest, typex, base_dir=tmpdir))
+
+    def test_check_cli_exit_codes(self):
+        import subprocess
+        with tempfile.TemporaryDirectory() as tmpdir:
+            with open(os.path.join(tmpdir, 'a.txt'), 'wb') as fh:
+                fh.write(b'changed')
+            manifest = os.path.join(tmpdir, 'SUMS')
+
+            def check(content, *options):
+                with open(manifest, 'w') as fh:
+                    fh.write(content)
+                return subprocess.run([sys.executable, '-m', 'daptools.generateSHA', '--check', manifest] +
+                                      list(options), cwd=tmpdir, capture_output=True, text=True,
+                                      env=dict(os.environ, PYTHONPATH=os.path.join(os.path.dirname(__file__),
+                                                                                   '../src')))
+
+            line = '{}  a.txt\n'.format(hashlib.sha256(b'original').hexdigest())
+            self.assertEqual(check(line).returncode, 1)
+            self.assertEqual(check(line, '--types', 'auto').returncode, 1)
+            result = check(line, '--types', 'sha256')
+            self.assertEqual(result.returncode, 2)
+            self.assertIn('sha256', result.stderr)
+            result = check('neni manifest\n')
+            self.assertEqual(result.returncode, 1)
+            self.assertIn('1 radku', result.stderr)
+            line = '{}  a.txt\n'.format(hashlib.sha256(b'changed').hexdigest())
+            self.assertEqual(check(line + 'vadny radek\n').returncode, 0)
+
+    def test_hash_stream(self):
+        data = os.urandom(100000)
+        expected = hashlib.sha256(data).hexdigest()
+        self.assertEqual(hash_stream(io.BytesIO(data), buffer_size=4096)['sha256sum'], expected)
+        chunks = (data[i:i + 999] for i in range(0, len(data), 999))
+        result = hash_stream(chunks, ['md5sum', 'sha256sum'])
+        self.assertEqual(list(result.keys()), ['md5sum', 'sha256sum'])
+        self.assertEqual(result['md5sum'], hashlib.md5(data).hexdigest())
+
+        packed = io.BytesIO(gzip.compress(data))
+        with gzip.GzipFile(fileobj=packed) as stream:       # dekomprese rovnou do hashlib
+            self.assertEqual(hash_stream(stream)['sha256sum'], expected)
+
+        class ReadOnly:                                      # jen read(), bez readinto()
+            def __init__(self):
+                self.inner = io.BytesIO(data)
+
+            def read(self, size):
+                return self.inner.read(size)
+        self.assertEqual(hash_stream(ReadOnly(), 'sha256sum')['sha256sum'], expected)
+
+        with self.assertRaises(TypeError):
+            hash_stream(['text'])
+
+    def test_hash_stream_tee(self):
+        data = os.urandom(50000)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            target = os.path.join(tmpdir, 'copy.bin')
+            with open(target, 'wb') as out:
+                result = hash_stream(io.BytesIO(data), 'sha1sum', destination=out, buffer_size=1000)
+            with open(target, 'rb') as fh:
+                self.assertEqual(fh.read(), data)
+            self.assertEqual(result['sha1sum'], hashlib.sha1(data).hexdigest())
+            with open(target, 'wb', buffering=0) as raw:      # raw zapis muze byt castecny
+                hash_stream(io.BytesIO(data), destination=raw)
+            self.assertEqual(os.path.getsize(target), len(data))
+
+    def test_extra_types(self):
+        with tempfile.NamedTemporaryFile(delete=False) as tmp:
+            tmp.write(b'test content')
+            tmp_path = tmp.name
+        hashes = get_hashsums(tmp_path, types=ALL_TYPES)
+        self.assertEqual(list(hashes.keys()), ALL_TYPES)
+        self.assertEqual(hashes['blake2bsum'], hashlib.blake2b(b'test content').hexdigest())
+        self.assertEqual(hashes['sha3_256sum'], hashlib.sha3_256(b'test content').hexdigest())
+        self.assertEqual(create_hash(tmp_path, 'blake2ssum')[0].hexdigest(),
+                         hashlib.blake2s(b'test content').hexdigest())
+        os.unlink(tmp_path)
+
+    def test_manifest_type_hints(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            manifest = os.path.join(tmpdir, 'SHA3-256SUMS')
+            with open(manifest, 'w') as fh:
+                fh.write('{}  a\n{}  b\n'.format('a' * 64, 'b' * 40))
+            self.assertEqual([typ for typ, _, _ in parse_manifest(manifest)], ['sha3_256sum', 'sha1sum'])
+            manifest = os.path.join(tmpdir, 'B2SUMS')
+            with open(manifest, 'w') as fh:
+                fh.write('{}  a\nBLAKE2s (b) = {}\n'.format('a' * 128, 'b' * 64))
+            self.assertEqual([typ for typ, _, _ in parse_manifest(manifest)], ['blake2bsum', 'blake2ssum'])
+
+    def test_select_fastest(self):
+        rates = benchmark_algorithms(['md5sum', 'sha256sum'], size=1 << 16, rounds=1)
+        self.assertEqual(set(rates.keys()), {'md5sum', 'sha256sum'})
+        self.assertGreaterEqual(*rates.values())                 # serazeno od nejrychlejsiho
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_file = os.path.join(tmpdir, 'bench.json')
+            fastest = select_fastest(['md5sum', 'sha512sum'], cache_file)
+            self.assertIn(fastest, ('md5sum', 'sha512sum'))
+            with open(cache_file) as fh:
+                stored = fh.read()
+            self.assertEqual(select_fastest(['md5sum', 'sha512sum'], cache_file), fastest)
+            with open(cache_file) as fh:
+                self.assertEqual(fh.read(), stored)                 # podruhe se nemeri
+
+    def test_progress(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for i in range(3):
+                with open(os.path.join(tmpdir, 'f{}'.format(i)), 'wb') as fh:
+                    fh.write(b'x' * 10000)
+            reports = []
+            progress = HashProgress(reports.append, interval=0)
+            create_hash(os.path.join(tmpdir, 'f0'), buffer_size=4096, progress=progress)
+            self.assertEqual((progress.files, progress.bytes), (1, 10000))
+            get_hashsums(os.path.join(tmpdir, 'f1'), progress=progress)
+            self.assertEqual((progress.files, progress.bytes), (2, 20000))
+            self.assertGreater(len(reports), 2)
+
+            for use_processes in (False, True):
+                progress = HashProgress()
+                list(hash_tree(tmpdir, workers=2, use_processes=use_processes, progress=progress))
+                self.assertEqual((progress.files, progress.bytes), (3, 30000))
+
+            manifest = os.path.join(tmpdir, 'SUMS')
+            with open(manifest, 'w') as fh:
+                fh.write('{}  f0\n{}  f1\n'.format(hashlib.sha256(b'x' * 10000).hexdigest(), 'a' * 64))
+            progress = HashProgress()
+            list(check_manifest(manifest, base_dir=tmpdir, progress=progress))
+            progress.finish()
+            self.assertEqual((progress.total_files, progress.total_bytes), (2, 20000))
+            self.assertEqual((progress.files, progress.failed, progress.bytes), (2, 1, 20000))
+            self.assertEqual(progress.eta, 0.0)
+            stats_file = os.path.join(tmpdir, 'stats.json')
+            progress.dump(stats_file)
+            with open(stats_file) as fh:
+                stats = json.load(fh)
+            self.assertEqual(stats['files'], 2)
+            self.assertIn('mb_per_s', stats)
+
+    def test_disk_order(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            paths = []
+            for i in range(5):
+                path = os.path.join(tmpdir, 'f{}'.format(i))
+                with open(path, 'wb') as fh:
+                    fh.write(os.urandom(5000))
+                paths.append(path)
+            offset = physical_offset(paths[0])
+            self.assertTrue(offset is None or offset >= 0)
+            self.assertIsNone(physical_offset(os.path.join(tmpdir, 'missing')))
+            for order in ('walk', 'inode', 'physical'):
+                ordered = order_files(paths + [os.path.join(tmpdir, 'missing')], order)
+                self.assertEqual(sorted(ordered[:-1]), sorted(paths))
+                self.assertTrue(ordered[-1].endswith('missing'))
+            by_inode = order_files(reversed(paths), 'inode')
+            self.assertEqual(by_inode, sorted(paths, key=lambda p: os.stat(p).st_ino))
+            with self.assertRaises(ValueError):
+                order_files(paths, 'random')
+
+            expected = dict(hash_tree(tmpdir))
+            for order in ('inode', 'physical'):
+                self.assertEqual(dict(hash_tree(tmpdir, workers=1, order=order, fadvise=True)), expected)
+            manifest = os.path.join(tmpdir, 'SUMS')
+            with open(manifest, 'w') as fh:
+                for path, digests in expected.items():
+                    fh.write('{}  {}\n'.format(digests['sha256sum'], os.path.basename(path)))
+            results = dict(check_manifest(manifest, base_dir=tmpdir, order='physical', fadvise=True))
+            self.assertEqual(set(results.values()), {'OK'})
+            self.assertEqual(list(benchmark_order(tmpdir, rounds=1)), ['walk', 'inode', 'physical'])
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
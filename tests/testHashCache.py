@@ -0,0 +1,90 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Unit tests for hashCache module.
+"""
+
+import unittest
+import tempfile
+import hashlib
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+from daptools.hashCache import HashCache, CachedDigest
+from daptools.generateSHA import get_hashsums, create_hash, hash_tree
+
+
+class TestHashCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = os.path.join(self.tmpdir.name, 'cache.db')
+        self.data_file = os.path.join(self.tmpdir.name, 'data.bin')
+        with open(self.data_file, 'wb') as fh:
+            fh.write(b'test content')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_put_get(self):
+        info = os.stat(self.data_file)
+        with HashCache(self.db) as cache:
+            self.assertIsNone(cache.get(info, 'sha256sum'))
+            cache.put(info, 'sha256sum', 'abcd')
+            self.assertEqual(cache.get(info, 'sha256sum'), 'abcd')
+            self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1, 'entries': 1})
+        with HashCache(self.db) as cache:            # perzistence
+            self.assertEqual(cache.get(info, 'sha256sum'), 'abcd')
+
+    def test_changed_file_misses(self):
+        with HashCache(self.db) as cache:
+            cache.put(os.stat(self.data_file), 'md5sum', 'abcd')
+            os.utime(self.data_file, ns=(0, 12345))
+            self.assertIsNone(cache.get(os.stat(self.data_file), 'md5sum'))
+
+    def test_lru_eviction(self):
+        files = []
+        for i in range(5):
+            path = os.path.join(self.tmpdir.name, 'f{}'.format(i))
+            open(path, 'w').close()
+            files.append(os.stat(path))
+        with HashCache(self.db, max_entries=3) as cache:
+            for info in files[:3]:
+                cache.put(info, 'md5sum', 'x')
+            cache.get(files[0], 'md5sum')            # f0 je ted nejcerstvejsi
+            cache.put(files[3], 'md5sum', 'x')
+            self.assertLessEqual(len(cache), 3)
+            self.assertEqual(cache.get(files[0], 'md5sum'), 'x')
+            self.assertIsNone(cache.get(files[1], 'md5sum'))
+
+    def test_invalidate_and_clear(self):
+        with HashCache(self.db) as cache:
+            info = os.stat(self.data_file)
+            cache.put(info, 'md5sum', 'a')
+            cache.put(info, 'sha1sum', 'b')
+            self.assertEqual(cache.invalidate(self.data_file), 2)
+            self.assertEqual(len(cache), 0)
+            cache.put(info, 'md5sum', 'a')
+            cache.clear()
+            self.assertIsNone(cache.get(info, 'md5sum'))
+
+    def test_generate_sha_integration(self):
+        expected = hashlib.sha256(b'test content').hexdigest()
+        with HashCache(self.db) as cache:
+            hash_obj, _ = create_hash(self.data_file, cache=cache)
+            self.assertEqual(hash_obj.hexdigest(), expected)
+            hash_obj, _ = create_hash(self.data_file, cache=cache)
+            self.assertIsInstance(hash_obj, CachedDigest)
+            self.assertEqual(hash_obj.hexdigest(), expected)
+
+            self.assertEqual(get_hashsums(self.data_file, cache=cache), get_hashsums(self.data_file))
+            self.assertEqual(get_hashsums(self.data_file, cache=cache)['sha256sum'], expected)
+
+            cache.hits = cache.misses = 0
+            results = dict(hash_tree(self.tmpdir.name, 'sha256sum', workers=2, cache=cache))
+            self.assertEqual(results[self.data_file]['sha256sum'], expected)
+            self.assertEqual(cache.hits, 1)          # data.bin z cache, cache.db spocitan
+
+
+if __name__ == '__main__':
+    unittest.main()
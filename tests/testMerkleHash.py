@@ -0,0 +1,108 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Unit tests for merkleHash module.
+"""
+
+import unittest
+import tempfile
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+from daptools.merkleHash import (build_tree, update_tree, diff_trees, verify_file, save_sidecar,
+                                 load_sidecar, reverify, block_count)
+
+
+class TestMerkleHash(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'image.bin')
+        self.data = bytearray(os.urandom(10 * 1024 + 100))
+        self._write()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self):
+        with open(self.path, 'wb') as fh:
+            fh.write(self.data)
+
+    def _patch(self, offset, payload):
+        with open(self.path, 'r+b') as fh:
+            fh.seek(offset)
+            fh.write(payload)
+        self.data[offset:offset + len(payload)] = payload
+
+    def _flip(self, offset):
+        """Zmeni byte na offset vzdy, i kdyz je data nahodna."""
+        self._patch(offset, bytes([self.data[offset] ^ 0xff]))
+
+    def test_block_count(self):
+        self.assertEqual(block_count(0, 1024), 1)
+        self.assertEqual(block_count(1024, 1024), 1)
+        self.assertEqual(block_count(1025, 1024), 2)
+
+    def test_build_is_stable(self):
+        tree = build_tree(self.path, 1024)
+        self.assertEqual(len(tree), 11)
+        self.assertEqual(tree.root, build_tree(self.path, 1024).root)
+        self.assertNotEqual(tree.root, build_tree(self.path, 2048).root)
+
+    def test_update_rehashes_only_changed_blocks(self):
+        tree = build_tree(self.path, 1024)
+        self._patch(3000, b'zmena')
+        new_tree, rehashed = update_tree(self.path, tree, [(3000, 5)])
+        self.assertEqual(rehashed, [2])
+        self.assertEqual(new_tree.root, build_tree(self.path, 1024).root)
+        self.assertNotEqual(new_tree.root, tree.root)
+
+    def test_update_after_resize(self):
+        tree = build_tree(self.path, 1024)
+        self.data += b'x' * 2000
+        self._write()
+        new_tree, rehashed = update_tree(self.path, tree, [])
+        self.assertEqual(rehashed, [10, 11, 12])
+        self.assertEqual(new_tree.root, build_tree(self.path, 1024).root)
+
+    def test_diff_and_verify(self):
+        tree = build_tree(self.path, 1024)
+        self._flip(0)
+        self._flip(9000)
+        changed = build_tree(self.path, 1024)
+        self.assertEqual(diff_trees(tree, changed), [0, 8])
+        self.assertEqual(verify_file(self.path, tree), [0, 8])
+        self.assertEqual(verify_file(self.path, tree, [1, 8]), [8])
+
+    def test_sidecar_roundtrip_and_reverify(self):
+        reference = build_tree(self.path, 1024)
+        sidecar = self.path + '.ref'
+        save_sidecar(reference, sidecar)
+        loaded = load_sidecar(sidecar)
+        self.assertEqual(loaded.root, reference.root)
+        self.assertEqual(loaded.leaves, reference.leaves)
+
+        self._flip(5000)
+        self.assertEqual(reverify(self.path, loaded), [4])      # bez sidecar spocita cely strom
+        self.assertEqual(reverify(self.path, loaded), [4])      # ted uz z aktualniho sidecar
+
+        size = os.path.getsize(sidecar)
+        with open(sidecar, 'r+b') as fh:               # posledni byte digestu, velikost zustane
+            fh.seek(-1, os.SEEK_END)
+            last = fh.read(1)[0]
+            fh.seek(-1, os.SEEK_END)
+            fh.write(bytes([last ^ 0xff]))
+        self.assertEqual(os.path.getsize(sidecar), size)
+        with self.assertRaisesRegex(ValueError, 'root hash'):
+            load_sidecar(sidecar)
+
+    def test_empty_file(self):
+        self.data = bytearray()
+        self._write()
+        tree = build_tree(self.path, 1024)
+        self.assertEqual(len(tree), 1)
+        self.assertEqual(verify_file(self.path, tree), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,8 +16,11 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
 from daptools.myTools import (
     contains, tree_walker, separate_full_path, strip_extension,
     strip_czech_chars, get_file_extension, convert_in_2_mm, convert_mm_2_in,
-    read_data_file, num_usr_in, str_enum_usr_in, rename_files, prepare_counter
+    read_data_file, num_usr_in, str_enum_usr_in, rename_files, prepare_counter, walk_entries,
+    iter_data_file, map_data_file, strip_czech_lines, strip_czech_file, strip_czech_cached,
+    count_patterns, count_patterns_file, PatternCounter
 )
+from daptools.myTools import _strip_czech_nfkd
 
 
 class TestMyTools(unittest.TestCase):
@@ -28,6 +31,29 @@ class TestMyTools(unittest.TestCase):
         self.assertEqual(contains(data, "pako", True), 1)
         self.assertEqual(contains(data, "xyz"), 0)
 
+    def test_count_patterns(self):
+        data = "super velky PAKO jako prako pAko pako PAKO aaaa Kůň KŮŇ"
+        patterns = ["pako", "ako", "xyz", "aa", "", "kůň", "PAKO"]
+        for case_sensitive in (False, True):
+            expected = {p: contains(data, p, case_sensitive) for p in patterns}
+            self.assertEqual(count_patterns(data, patterns, case_sensitive), expected)
+            counter = PatternCounter(patterns, case_sensitive)
+            for i in range(0, len(data), 3):                    # shoda pres hranice bloku
+                counter.feed(data[i:i + 3])
+            self.assertEqual(counter.counts(), expected)
+        self.assertEqual(count_patterns(data, ["pako"])["pako"], 4)
+        self.assertEqual(count_patterns("\u212a", ["k"])["k"], 1)     # Kelvin -> k jako str.lower
+        self.assertEqual(PatternCounter(["k", "\u00e5"]).feed("\u212a\u212b\u00c5").counts(), {"k": 1, "\u00e5": 2})
+        many = ["slovo%d" % i for i in range(150)] + ["pako"]        # nad hranici jde pres automat
+        text = data + " SLOVO7 slovo70 " * 3
+        self.assertEqual(count_patterns(text, many), {p: contains(text, p) for p in many})
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'log.txt')
+            with open(path, 'w', encoding='utf-8') as fh:
+                fh.write(data * 100)
+            self.assertEqual(count_patterns_file(path, patterns, chunk_size=7),
+                             {p: contains(data * 100, p) for p in patterns})
+
     def test_tree_walker(self):
         with tempfile.TemporaryDirectory() as tmpdir:
             # Create test files
@@ -42,6 +68,36 @@ class TestMyTools(unittest.TestCase):
             files_non_recursive = tree_walker(tmpdir, False)
             self.assertEqual(len(files_non_recursive), 1)
 
+    def test_walk_entries(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name, size in (('a.txt', 10), ('b.LOG', 100), ('sub/c.txt', 1000), ('sub/deep/d.txt', 5)):
+                path = os.path.join(tmpdir, name)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as fh:
+                    fh.write(b'x' * size)
+            os.utime(os.path.join(tmpdir, 'a.txt'), (1000, 1000))
+            os.symlink(os.path.join(tmpdir, 'sub'), os.path.join(tmpdir, 'link'))
+
+            def names(**kwargs):
+                return sorted(os.path.relpath(e.path, tmpdir) for e in walk_entries(tmpdir, **kwargs))
+
+            entries = walk_entries(tmpdir)
+            self.assertFalse(isinstance(entries, (tuple, list)))
+            self.assertEqual(names(), ['a.txt', 'b.LOG', 'sub/c.txt', 'sub/deep/d.txt'])
+            self.assertEqual(names(recursive=False), ['a.txt', 'b.LOG'])
+            self.assertEqual(names(max_depth=1), ['a.txt', 'b.LOG', 'sub/c.txt'])
+            self.assertEqual(names(extensions=('log',)), ['b.LOG'])
+            self.assertEqual(names(pattern='[cd].*'), ['sub/c.txt', 'sub/deep/d.txt'])
+            self.assertEqual(names(min_size=50, max_size=500), ['b.LOG'])
+            self.assertEqual(names(older_than=2000), ['a.txt'])
+            self.assertEqual(names(newer_than=2000, extensions=('txt',)), ['sub/c.txt', 'sub/deep/d.txt'])
+            first = next(walk_entries(tmpdir, extensions=('txt',)))
+            self.assertEqual(first.stat().st_size, 10)
+            self.assertEqual(sorted(tree_walker(tmpdir)), sorted(e.path for e in walk_entries(tmpdir)))
+            errors = []
+            self.assertEqual(list(walk_entries(os.path.join(tmpdir, 'missing'), onerror=errors.append)), [])
+            self.assertEqual(len(errors), 1)
+
     def test_separate_full_path(self):
         path, filename = separate_full_path("/home/user/file.txt")
         self.assertEqual(path, "/home/user/")
@@ -60,6 +116,21 @@ class TestMyTools(unittest.TestCase):
         result = strip_czech_chars(czech)
         self.assertEqual(result, "Prilis zlutoucky kun")
 
+    def test_strip_czech_table(self):
+        for code in list(range(0x3000)) + [0xFB01, 0xFF21, 0x2460]:     # tabulka i fallback na NFKD
+            self.assertEqual(strip_czech_chars(chr(code)), _strip_czech_nfkd(chr(code)), hex(code))
+        mixed = 'Dvořák – Ωmega ﬁnále ②'
+        self.assertEqual(strip_czech_chars(mixed), _strip_czech_nfkd(mixed))
+        self.assertEqual(list(strip_czech_lines(['Žižka\n', 'abc'])), ['Zizka\n', 'abc'])
+        self.assertEqual(strip_czech_cached('Kůň'), 'Kun')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            source, target = os.path.join(tmpdir, 'in.txt'), os.path.join(tmpdir, 'out.txt')
+            with open(source, 'w', encoding='utf-8') as fh:
+                fh.write('Příliš\nžluťoučký\nkůň\n')
+            self.assertEqual(strip_czech_file(source, target, buffer_lines=2), 3)
+            with open(target, encoding='utf-8') as fh:
+                self.assertEqual(fh.read(), 'Prilis\nzlutoucky\nkun\n')
+
     def test_get_file_extension(self):
         name, ext = get_file_extension("file.txt")
         self.assertEqual(name, "file")
@@ -92,6 +163,44 @@ class TestMyTools(unittest.TestCase):
         self.assertEqual(data[0].strip(), "data line 1")
         os.unlink(tmp_path)
 
+    def test_iter_data_file(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'data.txt')
+            with open(path, 'w') as fh:
+                fh.write("# header\nSTARTOFDATA x\n1;2\n; comment\n#also\nSTARTOFDATA\n3;4\nENDOFDATA\n5;6\n")
+            lines = iter_data_file(path)
+            self.assertFalse(isinstance(lines, tuple))
+            self.assertEqual(list(lines), ['1;2\n', '3;4\n'])
+            self.assertEqual(read_data_file(path), ('1;2\n', '3;4\n'))
+            self.assertEqual([bytes(line) for line in iter_data_file(path, use_mmap=True)], [b'1;2\n', b'3;4\n'])
+            with map_data_file(path) as block:
+                self.assertEqual(bytes(block), b'1;2\n; comment\n#also\nSTARTOFDATA\n3;4\n')
+            import mmap
+            from unittest import mock
+            mappings = []
+            real_mmap = mmap.mmap
+
+            def record(*args, **kwargs):
+                mappings.append(real_mmap(*args, **kwargs))
+                return mappings[-1]
+
+            with mock.patch('mmap.mmap', record):
+                lines = iter_data_file(path, use_mmap=True)
+                self.assertEqual(bytes(next(lines)), b'1;2\n')
+                lines.close()                                   # caller stopped early
+            self.assertTrue(mappings[0].closed)
+
+            cases = {'STARTOFDATA\nENDOFDATA\n': [], '': [], 'no markers\n': [], 'STARTOFDATA\na\nb': ['a\n', 'b'],
+                     'x\nSTARTOFDATA\n\nENDOFDATAxx\n': ['\n'], 'hdr\nENDOFDATA\nSTARTOFDATA\n1 2\nENDOFDATA\n': [],
+                     'ENDOFDATA\nSTARTOFDATA\n1 2\n': []}
+            for content, expected in cases.items():
+                with open(path, 'w') as fh:
+                    fh.write(content)
+                self.assertEqual(list(iter_data_file(path)), expected)
+                self.assertEqual([bytes(l).decode() for l in iter_data_file(path, use_mmap=True)], expected)
+                with map_data_file(path) as block:
+                    self.assertEqual(bytes(block).decode(), ''.join(expected))
+
     def test_rename_files(self):
         with tempfile.TemporaryDirectory() as tmpdir:
             old_file = os.path.join(tmpdir, "old.txt")
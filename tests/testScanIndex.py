@@ -0,0 +1,106 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Unit tests for scanIndex module.
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+from daptools.scanIndex import ScanIndex
+
+
+class TestScanIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmpdir, 'tree')
+        for name in ('a.txt', 'sub/b.txt', 'sub/deep/c.txt', 'other/d.txt'):
+            self.write(name, b'data')
+        self.index = ScanIndex(os.path.join(self.tmpdir, 'index.db'))
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, name, data):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fh:
+            fh.write(data)
+        return path
+
+    def age_dirs(self):
+        """Posune mtime adresaru do minulosti, aby jim index veril (jinak jsou 'racy')."""
+        for directory, _, _ in os.walk(self.root):
+            os.utime(directory, (1000, 1000))
+
+    def rel(self, changes):
+        return sorted((action, os.path.relpath(path, self.root)) for action, path in changes)
+
+    def test_scan(self):
+        first = self.rel(self.index.scan(self.root))
+        self.assertEqual(first, [('added', 'a.txt'), ('added', 'other/d.txt'), ('added', 'sub/b.txt'),
+                                 ('added', 'sub/deep/c.txt')])
+        self.age_dirs()
+        list(self.index.scan(self.root))            # zapamatuje si uz neracy mtime
+        stats = {}
+        self.assertEqual(list(self.index.scan(self.root, stats=stats)), [])
+        self.assertEqual((stats['dirs'], stats['listed'], stats['skipped']), (4, 0, 4))
+
+        self.write('sub/new.txt', b'new')
+        os.remove(os.path.join(self.root, 'a.txt'))
+        shutil.rmtree(os.path.join(self.root, 'other'))
+        with open(os.path.join(self.root, 'sub/deep/c.txt'), 'ab') as fh:     # adresar se nezmeni
+            fh.write(b'more')
+        stats = {}
+        changes = self.rel(self.index.scan(self.root, stats=stats))
+        self.assertEqual(changes, [('added', 'sub/new.txt'), ('removed', 'a.txt'), ('removed', 'other/d.txt')])
+        self.assertEqual(stats['listed'], 2)        # root a sub, deep se necetl
+        self.assertEqual(self.rel(self.index.scan(self.root, check_files=True)), [('modified', 'sub/deep/c.txt')])
+        self.assertEqual(sorted(os.path.relpath(p, self.root) for p in self.index.files(self.root)),
+                         ['sub/b.txt', 'sub/deep/c.txt', 'sub/new.txt'])
+
+    def test_kind_change_and_missing_root(self):
+        list(self.index.scan(self.root))
+        os.remove(os.path.join(self.root, 'a.txt'))
+        os.mkdir(os.path.join(self.root, 'a.txt'))
+        self.write('a.txt/e.txt', b'e')
+        shutil.rmtree(os.path.join(self.root, 'sub'))
+        self.write('sub', b'file now')
+        self.assertEqual(self.rel(self.index.scan(self.root)),
+                         [('added', 'a.txt/e.txt'), ('added', 'sub'), ('removed', 'a.txt'),
+                          ('removed', 'sub/b.txt'), ('removed', 'sub/deep/c.txt')])
+        shutil.rmtree(self.root)
+        self.assertEqual(len(list(self.index.scan(self.root))), 3)
+        self.assertEqual(list(self.index.files(self.root)), [])
+
+    def test_unreadable_directory(self):
+        from unittest import mock
+        list(self.index.scan(self.root))
+        self.age_dirs()
+        list(self.index.scan(self.root))
+        self.write('sub/new.txt', b'new')           # sub se musi znovu precist
+        sub = os.path.join(self.root, 'sub')
+        real_scandir = os.scandir
+
+        def scandir(path):
+            if path == sub:
+                raise PermissionError(13, 'Permission denied', path)
+            return real_scandir(path)
+
+        errors, stats = [], {}
+        with mock.patch('os.scandir', scandir):
+            self.assertEqual(list(self.index.scan(self.root, stats=stats, onerror=errors.append)), [])
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual([error.filename for error in errors], [sub])
+        self.assertIn(os.path.join(sub, 'deep', 'c.txt'), list(self.index.files(self.root)))
+        self.assertEqual(self.rel(self.index.scan(self.root)), [('added', 'sub/new.txt')])
+        self.assertEqual(len(list(self.index.files(self.root))), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
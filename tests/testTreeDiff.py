@@ -0,0 +1,88 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Unit tests for treeDiff module.
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+from daptools.treeDiff import compare_trees
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.write(data)
+
+
+class TestTreeDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.a = os.path.join(self.tmpdir, 'a')
+        self.b = os.path.join(self.tmpdir, 'b')
+        files = {'same.txt': b'same', 'touched.txt': b'touched', 'edited.txt': b'edit 1',
+                 'grown.txt': b'short', 'old/moved.bin': b'moved content', 'gone.txt': b'gone!',
+                 'twin1.txt': b'twin', 'twin2.txt': b'twin'}
+        for name, data in files.items():
+            write(os.path.join(self.a, name), data)
+        shutil.copytree(self.a, self.b)
+        write(os.path.join(self.b, 'touched.txt'), b'touched')     # jina mtime, stejny obsah
+        os.utime(os.path.join(self.b, 'touched.txt'), ns=(0, 0))
+        write(os.path.join(self.b, 'edited.txt'), b'edit 2')
+        os.utime(os.path.join(self.b, 'edited.txt'), ns=(0, 0))
+        write(os.path.join(self.b, 'grown.txt'), b'much longer')
+        os.rename(os.path.join(self.b, 'old/moved.bin'), os.path.join(self.b, 'new.bin'))
+        os.remove(os.path.join(self.b, 'gone.txt'))
+        write(os.path.join(self.b, 'fresh.txt'), b'fresh')          # stejna velikost jako gone.txt
+        os.rename(os.path.join(self.b, 'twin2.txt'), os.path.join(self.b, 'twin3.txt'))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_compare_trees(self):
+        stats = {}
+        changes = list(compare_trees(self.a, self.b, workers=2, stats=stats))
+        self.assertEqual(sorted(changes), sorted([
+            ('modified', 'grown.txt'), ('modified', 'edited.txt'), ('moved', 'old/moved.bin', 'new.bin'),
+            ('removed', 'gone.txt'), ('added', 'fresh.txt'), ('moved', 'twin2.txt', 'twin3.txt')]))
+        self.assertEqual(changes[0], ('modified', 'grown.txt'))     # bez hashovani jde prvni
+        self.assertEqual((stats['files_a'], stats['files_b']), (8, 8))
+        self.assertEqual(stats['hashed'], 10)       # touched, edited a 3 pary kandidatu na presun
+        self.assertNotIn(('modified', 'same.txt'), changes)
+
+    def test_deep(self):
+        write(os.path.join(self.b, 'same.txt'), b'SAME')
+        os.utime(os.path.join(self.b, 'same.txt'), ns=(os.stat(os.path.join(self.a, 'same.txt')).st_atime_ns,
+                                                       os.stat(os.path.join(self.a, 'same.txt')).st_mtime_ns))
+        self.assertNotIn(('modified', 'same.txt'), list(compare_trees(self.a, self.b)))
+        self.assertIn(('modified', 'same.txt'), list(compare_trees(self.a, self.b, deep=True)))
+        self.assertEqual(list(compare_trees(self.a, self.a)), [])
+
+    def test_unreadable_after_scan(self):
+        stats = {}
+        changes = compare_trees(self.a, self.b, workers=1, stats=stats)
+        self.assertEqual(next(changes), ('modified', 'grown.txt'))   # scan hotovy, hashovani jeste ne
+        os.remove(os.path.join(self.b, 'edited.txt'))
+        os.remove(os.path.join(self.b, 'twin3.txt'))
+        rest = list(changes)
+        self.assertIn(('error', 'edited.txt'), rest)
+        self.assertIn(('error', 'twin3.txt'), rest)
+        self.assertIn(('removed', 'twin2.txt'), rest)
+        self.assertIn(('moved', 'old/moved.bin', 'new.bin'), rest)
+        self.assertEqual(stats['errors'], 2)
+
+    @unittest.skipUnless(hasattr(os, 'mkfifo'), 'needs os.mkfifo')
+    def test_fifo_skipped(self):
+        os.mkfifo(os.path.join(self.a, 'pipe'))
+        os.mkfifo(os.path.join(self.b, 'pipe'))
+        os.utime(os.path.join(self.b, 'pipe'), ns=(0, 0))
+        self.assertNotIn(('modified', 'pipe'), list(compare_trees(self.a, self.b, deep=True)))
+
+
+if __name__ == '__main__':
+    unittest.main()
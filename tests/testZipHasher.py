@@ -0,0 +1,73 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Unit tests for zipHasher module.
+"""
+
+import unittest
+import tempfile
+import hashlib
+import zipfile
+import zlib
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+from daptools.zipHasher import hash_archives, find_archives
+
+
+class TestZipHasher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.contents = {'a.txt': b'hello' * 1000, 'sub/b.bin': os.urandom(50000), 'empty': b''}
+        self.archives = []
+        for i, compression in enumerate((zipfile.ZIP_DEFLATED, zipfile.ZIP_STORED)):
+            path = os.path.join(self.tmpdir.name, 'arch{}.zip'.format(i))
+            with zipfile.ZipFile(path, 'w', compression) as archive:
+                archive.writestr('sub/', b'')
+                for name, data in self.contents.items():
+                    archive.writestr(name, data)
+            self.archives.append(path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_hash_archives(self):
+        expected = {(path, name): hashlib.sha256(data).hexdigest()
+                    for path in self.archives for name, data in self.contents.items()}
+        self.assertEqual(find_archives(self.tmpdir.name), self.archives)
+        for batch_bytes in (1, 1 << 20):
+            got = {key: d['sha256sum'] for key, d in hash_archives(self.tmpdir.name, workers=2,
+                                                                   batch_bytes=batch_bytes)}
+            self.assertEqual(got, expected)
+        single = dict(hash_archives(self.archives[0], ['md5sum', 'sha1sum']))
+        self.assertEqual(single[(self.archives[0], 'a.txt')]['md5sum'],
+                         hashlib.md5(self.contents['a.txt']).hexdigest())
+        with self.assertRaises(ValueError):
+            list(hash_archives(self.archives, 'crc64'))
+
+    def test_crc_only(self):
+        got = dict(hash_archives(self.archives, crc_only=True))
+        self.assertEqual(got[(self.archives[1], 'sub/b.bin')]['crc32'],
+                         '{:08x}'.format(zlib.crc32(self.contents['sub/b.bin'])))
+        self.assertEqual(len(got), 6)
+
+    def test_damaged(self):
+        broken = os.path.join(self.tmpdir.name, 'broken.zip')
+        with open(broken, 'wb') as fh:
+            fh.write(b'not a zip')
+        corrupt = self.archives[1]                  # stored, takze staci prepsat data
+        with open(corrupt, 'r+b') as fh:
+            data = fh.read()
+            fh.seek(data.index(b'hellohello'))
+            fh.write(b'HELLO')
+        results = dict(hash_archives([broken, corrupt], skip_errors=True))
+        self.assertIsNone(results[(broken, None)])
+        self.assertIsNone(results[(corrupt, 'a.txt')])          # nesouhlasi CRC32
+        self.assertIsNotNone(results[(corrupt, 'sub/b.bin')])
+        with self.assertRaises(zipfile.BadZipFile):
+            list(hash_archives([corrupt]))
+
+
+if __name__ == '__main__':
+    unittest.main()